@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,11 +77,156 @@ WSGI_APPLICATION = 'alumni_tracking.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite tuning for concurrent requests: WAL lets readers run alongside the
+# writer, writers wait up to `timeout` seconds for the lock instead of failing,
+# and transactions start with BEGIN IMMEDIATE so they never have to upgrade a
+# read lock mid-way.
+SQLITE_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=20000;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-20000;'
+    ),
+}
+
+# Production: set DB_ENGINE=postgresql plus DB_NAME, DB_USER, DB_PASSWORD,
+# DB_HOST and DB_PORT. DB_POOL=1 uses psycopg 3's connection pool; otherwise
+# connections persist for DB_CONN_MAX_AGE seconds and are health-checked
+# before reuse. DB_STATEMENT_TIMEOUT (ms) caps any single query.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+
+def postgres_database(host):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'alumni_tracking'),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': host,
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'OPTIONS': {
+            'options': f"-c statement_timeout={os.environ.get('DB_STATEMENT_TIMEOUT', '5000')}",
+        },
+        # .iterator() streams through server-side cursors unless a transaction
+        # pooler such as PgBouncer sits in front (then set this to 1)
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', '') == '1',
     }
+    if os.environ.get('DB_POOL', '') == '1':
+        database['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+        database['CONN_HEALTH_CHECKS'] = True
+    return database
+
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {'default': postgres_database(os.environ.get('DB_HOST', 'localhost'))}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': SQLITE_OPTIONS,
+        }
+    }
+
+# Funnel like/interest toggles through one background writer that commits
+# them in batches (core/write_queue.py). Off by default.
+SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE', '') == '1'
+SQLITE_WRITE_QUEUE_TIMEOUT = 10
+
+# Write-behind mode for like/interest toggles (see core/write_behind.py):
+# clicks are buffered in memory and written in one batch per flush interval.
+# Each worker process buffers and flushes its own clicks.
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '') == '1'
+WRITE_BEHIND_FLUSH_MS = int(os.environ.get('WRITE_BEHIND_FLUSH_MS', 200))
+
+# Threads core.search uses to run the global search's category queries side by
+# side, each with its own database connection; 1 runs them one after another.
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', 6))
+
+# How often each process's typeahead index (core/typeahead.py) checks whether
+# other workers changed the users, events or forums it holds, and rebuilds.
+TYPEAHEAD_CHECK_SECONDS = int(os.environ.get('TYPEAHEAD_CHECK_SECONDS', 30))
+
+# Global search result cache (core/search_cache.py): an in-process LRU of
+# SEARCH_CACHE_SIZE pages kept SEARCH_CACHE_TTL seconds, optionally backed by
+# the CACHES alias in SEARCH_CACHE_SHARED. Entries are keyed by per-model
+# version counters kept in the SEARCH_CACHE_VERSIONS alias, which must be a
+# shared backend when several worker processes serve the site. Left unset, the
+# cache is on only when that alias is shared (not LocMem/Dummy); set 1 to force
+# it on for a single-process server, 0 to turn it off.
+SEARCH_CACHE_ENABLED = {'1': True, '0': False}.get(os.environ.get('SEARCH_CACHE_ENABLED', ''))
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 2000))
+SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 120))
+SEARCH_CACHE_SHARED = os.environ.get('SEARCH_CACHE_SHARED', '')
+SEARCH_CACHE_VERSIONS = os.environ.get('SEARCH_CACHE_VERSIONS', 'default')
+
+# Rendered profile cards (core/profile_cards.py), kept in the PROFILE_CARD_CACHE
+# alias. Keys carry each user's profile_changed_at stamp, so the timeout only
+# bounds how long retired cards linger.
+PROFILE_CARD_CACHE = os.environ.get('PROFILE_CARD_CACHE', 'default')
+PROFILE_CARD_TIMEOUT = int(os.environ.get('PROFILE_CARD_TIMEOUT', 24 * 60 * 60))
+
+# Admin audit log (core.audit): events are queued in memory and written with
+# one bulk INSERT every AUDIT_FLUSH_MS, or sooner once AUDIT_FLUSH_EVENTS are
+# waiting. Anything still queued is written when the process exits.
+# AUDIT_ASYNC=0 writes each event inline instead.
+AUDIT_ASYNC = os.environ.get('AUDIT_ASYNC', '1') == '1'
+AUDIT_FLUSH_MS = int(os.environ.get('AUDIT_FLUSH_MS', 250))
+AUDIT_FLUSH_EVENTS = int(os.environ.get('AUDIT_FLUSH_EVENTS', 200))
+
+# Re-ranking a user's "alumni you may know" after a profile edit
+# (core.recommendations) runs on a background thread once the edit commits.
+# RECOMMENDATIONS_ASYNC=0 runs it inline at commit instead.
+RECOMMENDATIONS_ASYNC = os.environ.get('RECOMMENDATIONS_ASYNC', '1') == '1'
+
+# Read replicas: DATABASE_REPLICAS is a comma-separated list of replica hosts
+# (PostgreSQL) or SQLite files holding copies of the primary. Read-only views
+# read from them (see core/db_router.py); tests mirror them onto the default
+# database.
+DATABASE_REPLICAS = []
+for index, replica_name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    if DB_ENGINE == 'postgresql':
+        DATABASES[alias] = postgres_database(replica_name.strip())
+    else:
+        DATABASES[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': replica_name.strip(),
+            'OPTIONS': SQLITE_OPTIONS,
+        }
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 5     # read from the primary this long after a client writes
+REPLICA_CHECK_INTERVAL = 10    # seconds between health probes of a replica
+REPLICA_RETRY_SECONDS = 30     # how long a failed replica is skipped
+
+# Token-bucket limits for write endpoints, by URL name. Each entry gives a
+# (capacity, tokens refilled per second) bucket per signed-in user and per
+# client IP; the IP bucket is looser because campus networks share addresses.
+# RATE_LIMIT_STORE is 'local' (per process) or 'cache' (shared through CACHES).
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'local')
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.environ.get('RATE_LIMIT_TRUST_FORWARDED_FOR', '') == '1'
+RATE_LIMITS = {
+    'like_post_ajax': {'user': (30, 1.0), 'ip': (120, 4.0)},
+    'toggle_event_interest': {'user': (30, 1.0), 'ip': (120, 4.0)},
+    'comment_post': {'user': (10, 0.2), 'ip': (60, 1.0)},
+    'forum': {'user': (20, 0.5), 'ip': (100, 2.0)},
+    'forum_post_create': {'user': (5, 0.05), 'ip': (30, 0.5)},
+    'forum_post_delete': {'user': (20, 0.5), 'ip': (100, 2.0)},
+    'forum_comment_delete': {'user': (20, 0.5), 'ip': (100, 2.0)},
 }
 
 
@@ -123,6 +271,17 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media is served by core.views.serve_media, which checks the request and then
+# hands the file to the front server when MEDIA_SENDFILE names one:
+#   'x-accel-redirect' (nginx) needs an internal location mapping
+#       MEDIA_ACCEL_PREFIX onto MEDIA_ROOT, e.g.
+#       location /protected-media/ { internal; alias /srv/alumni/media/; }
+#   'x-sendfile' (Apache mod_xsendfile) needs XSendFilePath set to MEDIA_ROOT.
+# Without one, Django streams the file itself with Range/ETag support.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = 60 * 60  # seconds browsers may reuse a media file without revalidating
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
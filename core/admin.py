@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Event, Updates, Forum
+from .models import CustomUser, Event, Updates, Forum, CanonicalJobTitle
 from .forms import CustomUserCreationForm
 
 class CustomUserAdmin(UserAdmin):
@@ -36,3 +36,4 @@ admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Event)
 admin.site.register(Updates)
 admin.site.register(Forum)
+admin.site.register(CanonicalJobTitle)
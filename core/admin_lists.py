@@ -0,0 +1,107 @@
+import math
+
+from .keyset import decode_cursor, encode_cursor, keyset_filter, reverse_ordering
+
+
+class CountInfo:
+    """The bits of a Paginator the admin templates read (`count` and `num_pages`)."""
+
+    def __init__(self, count, per_page):
+        self.count = count
+        self.num_pages = max(1, math.ceil(count / per_page))
+
+
+class KeysetPage:
+    def __init__(self, object_list, number, paginator, has_previous, has_next, previous_query, next_query):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.previous_query = previous_query
+        self.next_query = next_query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+def paginate_admin_list(request, queryset, sorts, default_sort, per_page=10):
+    """Sort `queryset` by a whitelisted key and return one page of it.
+
+    `sorts` maps the accepted `?sort=` values to tuples of model fields; anything
+    else falls back to `default_sort`. Previous/Next links carry a keyset cursor
+    (`after`/`before`) so walking deep into a list never turns into a large
+    OFFSET. `?page=N` only labels the page a cursor leads to; without a cursor
+    the list starts from the first page.
+    """
+    sort = request.GET.get('sort', default_sort)
+    if sort not in sorts:
+        sort = default_sort
+    ordering = list(sorts[sort])
+    ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+
+    # admins act on what the total says, so it is counted fresh rather than cached
+    paginator = CountInfo(queryset.order_by().count(), per_page)
+    after = decode_cursor(request.GET.get('after', ''), len(ordering))
+    before = decode_cursor(request.GET.get('before', ''), len(ordering))
+
+    number = 1
+    if after is not None or before is not None:
+        try:
+            number = int(request.GET.get('page', 1))
+        except (TypeError, ValueError):
+            pass
+        number = min(max(number, 1), paginator.num_pages)
+
+    if after is not None:
+        rows = list(queryset.filter(keyset_filter(ordering, after, True)).order_by(*ordering)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = True
+    elif before is not None:
+        rows = list(queryset.filter(keyset_filter(ordering, before, False)).order_by(*reverse_ordering(ordering))[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = False
+
+    def boundary(row):
+        return [getattr(row, field.lstrip('-')) for field in ordering]
+
+    def page_query(page, **cursor):
+        params = request.GET.copy()
+        for key in ('page', 'after', 'before'):
+            params.pop(key, None)
+        params['page'] = page
+        params['sort'] = sort
+        for key, values in cursor.items():
+            params[key] = encode_cursor(values)
+        return params.urlencode()
+
+    previous_query = next_query = ''
+    if rows:
+        if has_previous:
+            previous_query = page_query(max(number - 1, 1), before=boundary(rows[0]))
+        if has_next:
+            next_query = page_query(number + 1, after=boundary(rows[-1]))
+
+    return KeysetPage(rows, number, paginator, has_previous, has_next, previous_query, next_query)
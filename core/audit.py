@@ -0,0 +1,117 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import AuditEvent
+
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUED_EVENTS = 100000  # past this, a database that keeps failing starts costing the oldest events
+
+
+class AuditQueue:
+    """Admin actions queued in memory and written by a background thread.
+
+    record() only builds an unsaved AuditEvent and appends it, so the admin
+    request never waits on the insert. The thread wakes every AUDIT_FLUSH_MS,
+    or as soon as AUDIT_FLUSH_EVENTS are waiting, and writes the whole queue
+    with one bulk_create. A failed flush puts its events back to be retried,
+    and whatever is still queued when the process exits is written by an
+    atexit hook (gunicorn and runserver both exit normally on SIGTERM).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queue = []
+        self._wake = threading.Event()
+        self._thread = None
+
+    def put(self, event):
+        self._ensure_started()
+        with self._lock:
+            self._queue.append(event)
+            if len(self._queue) > MAX_QUEUED_EVENTS:
+                dropped = len(self._queue) - MAX_QUEUED_EVENTS
+                del self._queue[:dropped]
+                logger.error('audit queue full; dropped %d oldest events', dropped)
+            full = len(self._queue) >= settings.AUDIT_FLUSH_EVENTS
+        if full:
+            self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._queue)
+
+    def flush(self):
+        """Write everything queued so far; returns the number of events written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._queue = self._queue, []
+            if not batch:
+                return 0
+            try:
+                AuditEvent.objects.bulk_create(batch)
+            except Exception:
+                logger.exception('audit flush of %d events failed; retrying', len(batch))
+                with self._lock:
+                    self._queue[:0] = batch
+                return 0
+            return len(batch)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = settings.AUDIT_FLUSH_MS / 1000
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+
+queue = AuditQueue()
+atexit.register(queue.flush)
+
+
+def _label(obj):
+    if obj is None:
+        return ''
+    label = getattr(obj, 'full_name', '') or getattr(obj, 'title', '') or str(obj)
+    return label[:200]
+
+
+def record(actor, action, target_type, target=None, **detail):
+    """Log one admin action on `target` (or on many rows, described by `detail`).
+
+    Returns immediately: the event is written with the next batch, or inline
+    when AUDIT_ASYNC is off.
+    """
+    event = AuditEvent(
+        created_at=timezone.now(),
+        actor=actor if actor is not None and actor.pk else None,
+        actor_label=_label(actor) or getattr(actor, 'username', '') or '',
+        action=action,
+        target_type=target_type,
+        target_id=target.pk if target is not None else None,
+        target_label=_label(target),
+        detail=detail,
+    )
+    if settings.AUDIT_ASYNC:
+        queue.put(event)
+    else:
+        event.save()
+    return event
@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import search_cache, typeahead
+from .models import ClubOrg, Comment, CustomUser, Event, Forum, JobEntry, Like
+
+
+BULK_CHUNK_SIZE = 200
+HASH_WORKERS = 4
+
+BULK_USER_ACTIONS = {
+    'deactivate': 'Deactivate',
+    'activate': 'Activate',
+    'reset': 'Reset password',
+    'delete': 'Delete',
+}
+
+# bulk action -> AuditEvent.action it is logged as
+BULK_AUDIT_ACTIONS = {
+    'deactivate': 'deactivate',
+    'activate': 'activate',
+    'reset': 'reset_password',
+    'delete': 'delete',
+}
+
+
+def _id_chunks(queryset, size=BULK_CHUNK_SIZE):
+    # keyset over pk, so rows an update moves out of `queryset` are not skipped past
+    # and no more than `size` ids are held or bound at once
+    ids = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = 0
+    while True:
+        chunk = list(ids.filter(pk__gt=last_pk)[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def set_users_active(queryset, active):
+    """Flip is_active for every matching user, one UPDATE ... WHERE id IN per BULK_CHUNK_SIZE users.
+
+    Activating also clears deleted_at, restoring soft-deleted users, so that
+    purge_deleted_users does not hard-delete an account that was just reactivated.
+    """
+    fields = {'is_active': active}
+    if active:
+        fields['deleted_at'] = None
+    count = 0
+    for user_ids in _id_chunks(queryset):
+        count += CustomUser.objects.filter(id__in=user_ids).update(**fields)
+        typeahead.sync_users(user_ids)
+    search_cache.bump('customuser')
+    return count
+
+
+def reset_user_passwords(queryset):
+    """Reset each user's password back to their student number (or username).
+
+    PBKDF2 runs inside hashlib, which releases the GIL, so hashing is spread
+    over a small thread pool and the results are written back with bulk_update.
+    """
+    users = list(queryset.only('id', 'student_number', 'username'))
+    if not users:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        hashes = pool.map(lambda u: make_password(u.student_number or u.username), users)
+        for user, hashed in zip(users, hashes):
+            user.password = hashed
+
+    CustomUser.objects.bulk_update(users, ['password'], batch_size=BULK_CHUNK_SIZE)
+    return len(users)
+
+
+def soft_delete_users(queryset):
+    """Deactivate and stamp deleted_at, a chunk of users per UPDATE; purge_deleted_users removes the rows later."""
+    deleted_at = timezone.now()
+    count = 0
+    for user_ids in _id_chunks(queryset.filter(deleted_at__isnull=True)):
+        count += CustomUser.objects.filter(id__in=user_ids).update(is_active=False, deleted_at=deleted_at)
+        typeahead.sync_users(user_ids)
+    search_cache.bump('customuser')
+    return count
+
+
+def delete_in_batches(queryset, batch_size=BULK_CHUNK_SIZE, pause=0):
+    """Hard-delete a queryset `batch_size` rows per transaction, sleeping `pause` seconds in between."""
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_user(user, batch_size=BULK_CHUNK_SIZE, pause=0):
+    """Remove a soft-deleted user's dependent rows in small batches, then the user itself.
+
+    Rows hanging off the user's own forum posts go first so that deleting a
+    post never cascades through thousands of likes or comments at once.
+    """
+    interested = Event.interested.through.objects.filter(customuser_id=user.pk)
+    for queryset in (
+        Like.objects.filter(post__author=user),
+        Comment.objects.filter(post__author=user),
+        Like.objects.filter(user=user),
+        Comment.objects.filter(user=user),
+        Forum.objects.filter(author=user),
+        JobEntry.objects.filter(user=user),
+        ClubOrg.objects.filter(user=user),
+        interested,
+    ):
+        delete_in_batches(queryset, batch_size, pause)
+    user.delete()
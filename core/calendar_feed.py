@@ -0,0 +1,127 @@
+import datetime
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Event, audience_q
+
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 24  # documents are keyed by content version, so they never go stale
+TOKEN_SALT = 'core.calendar_feed'
+
+_signer = signing.Signer(salt=TOKEN_SALT)
+
+
+def feed_token(user):
+    return _signer.sign(f'{user.pk}:{user.calendar_token_version}')
+
+
+def parse_token(token):
+    """(user id, token version) signed into a feed token, or None if it was tampered with."""
+    try:
+        value = _signer.unsign(token)
+    except signing.BadSignature:
+        return None
+    # links issued before tokens were versioned carry only the id and count as version 0
+    user_id, _, version = value.partition(':')
+    try:
+        return int(user_id), int(version or 0)
+    except ValueError:
+        return None
+
+
+def audience_events(batch_id, degree_id):
+    """Dated events visible to everyone sharing this Batch and Degree (same rules as Event.visible)."""
+    return Event.objects.filter(date__isnull=False).filter(audience_q(batch_id, degree_id)).distinct()
+
+
+def audience_etag(batch_id, degree_id):
+    """Strong ETag for one audience's feed, from a single aggregate query.
+
+    Any edit bumps updated_at (audience changes do too, see core.signals),
+    a new event raises the max id and a removed one lowers the count.
+    """
+    state = audience_events(batch_id, degree_id).order_by().aggregate(
+        n=Count('id', distinct=True), changed=Max('updated_at'), last=Max('id'),
+    )
+    changed = state['changed'].isoformat() if state['changed'] else ''
+    raw = f"{batch_id}|{degree_id}|{state['n']}|{changed}|{state['last']}"
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _escape(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _fold(line):
+    # RFC 5545 lines are at most 75 octets; continuation lines start with a space
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts = []
+    while raw:
+        cut = 75 if not parts else 74
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1  # never split a UTF-8 sequence
+        parts.append(raw[:cut].decode())
+        raw = raw[cut:]
+    return '\r\n '.join(parts)
+
+
+def _utc(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_vevent(event, host):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{host}',
+        f'DTSTAMP:{_utc(event.updated_at)}',
+        f'LAST-MODIFIED:{_utc(event.updated_at)}',
+    ]
+    if event.time is None:
+        lines.append(f'DTSTART;VALUE=DATE:{event.date:%Y%m%d}')
+        lines.append(f'DTEND;VALUE=DATE:{event.date + datetime.timedelta(days=1):%Y%m%d}')
+    else:
+        lines.append(f'DTSTART:{_utc(event.starts_at)}')
+    lines.append(f'SUMMARY:{_escape(event.title)}')
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.location:
+        lines.append(f'LOCATION:{_escape(event.location)}')
+    lines.append('END:VEVENT')
+    return '\r\n'.join(_fold(line) for line in lines)
+
+
+def _vevents(rows, host):
+    """VEVENT text for each (id, updated_at), rendering only events not already cached at that version."""
+    keys = {pk: f'calendar:vevent:{host}:{pk}:{updated_at.timestamp()}' for pk, updated_at in rows}
+    cached = cache.get_many(keys.values())
+    missing = [pk for pk, key in keys.items() if key not in cached]
+    if missing:
+        fresh = {keys[event.pk]: render_vevent(event, host) for event in Event.objects.filter(pk__in=missing)}
+        cache.set_many(fresh, FEED_CACHE_TIMEOUT)
+        cached.update(fresh)
+    return [cached[keys[pk]] for pk, _ in rows if keys[pk] in cached]
+
+
+def audience_document(batch_id, degree_id, etag, host):
+    """The .ics body for one audience at version `etag`, built once and shared by all its members."""
+    doc_key = f'calendar:doc:{host}:{etag}'
+    body = cache.get(doc_key)
+    if body is None:
+        rows = list(audience_events(batch_id, degree_id).order_by('starts_at', 'id').values_list('id', 'updated_at'))
+        body = '\r\n'.join([
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            f'PRODID:-//{host}//Alumni Events//EN',
+            'CALSCALE:GREGORIAN',
+            'X-WR-CALNAME:Alumni Events',
+            *_vevents(rows, host),
+            'END:VCALENDAR',
+            '',
+        ])
+        cache.set(doc_key, body, FEED_CACHE_TIMEOUT)
+    return body
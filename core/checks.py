@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from . import search_cache
+
+
+@register()
+def check_search_cache_versions(app_configs, **kwargs):
+    """Forcing the search cache on with process-local version counters serves stale results across workers."""
+    if settings.SEARCH_CACHE_ENABLED and not search_cache.versions_shared():
+        return [Warning(
+            "SEARCH_CACHE_ENABLED is on but SEARCH_CACHE_VERSIONS "
+            f"('{settings.SEARCH_CACHE_VERSIONS}') is a process-local cache.",
+            hint="Point SEARCH_CACHE_VERSIONS at a shared backend (Redis, Memcached, database) "
+                 "or leave SEARCH_CACHE_ENABLED unset when more than one worker serves the site.",
+            id='core.W001',
+        )]
+    return []
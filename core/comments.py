@@ -0,0 +1,70 @@
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .keyset import decode_cursor, encode_cursor, keyset_filter
+from .models import Comment
+
+
+COMMENT_PREVIEW = 3  # comments shown under each post on the forum listing
+COMMENT_PAGE_SIZE = 20  # comments per "load older" request and on the detail view
+
+# newest first; the id breaks ties between comments saved in the same instant
+COMMENT_ORDERING = ['-created_at', '-id']
+
+
+def live_comments():
+    return Comment.objects.filter(user__deleted_at__isnull=True).select_related('user')
+
+
+def attach_latest_comments(posts, limit=COMMENT_PREVIEW):
+    """Give each post its newest `limit` comments in a single window-function query.
+
+    Sets `latest_comments` (oldest first, ready to render), `comment_total`
+    and `older_comments_cursor` (empty when nothing older is hidden) on every
+    post and returns the posts as a list.
+    """
+    posts = list(posts)
+    by_post = {post.pk: post for post in posts}
+    for post in posts:
+        post.latest_comments = []
+        post.comment_total = 0
+        post.older_comments_cursor = ''
+
+    ordering = [F(field.lstrip('-')).desc() for field in COMMENT_ORDERING]
+    rows = (
+        live_comments()
+        .filter(post_id__in=by_post)
+        .annotate(
+            rank=Window(RowNumber(), partition_by=F('post_id'), order_by=ordering),
+            total=Window(Count('id'), partition_by=F('post_id')),
+        )
+        .filter(rank__lte=limit)
+        .order_by('post_id', 'created_at', 'id')
+    )
+    for comment in rows:
+        post = by_post[comment.post_id]
+        post.latest_comments.append(comment)
+        post.comment_total = comment.total
+
+    for post in posts:
+        if post.comment_total > len(post.latest_comments):
+            post.older_comments_cursor = comment_cursor(post.latest_comments[0])
+    return posts
+
+
+def comment_cursor(comment):
+    return encode_cursor([getattr(comment, field.lstrip('-')) for field in COMMENT_ORDERING])
+
+
+def older_comments(post, cursor, limit=COMMENT_PAGE_SIZE):
+    """The `limit` comments just older than `cursor`, oldest first, plus the cursor for the page before them.
+
+    An empty or malformed cursor starts from the newest comment.
+    """
+    comments = live_comments().filter(post=post)
+    values = decode_cursor(cursor or '', len(COMMENT_ORDERING))
+    if values is not None:
+        comments = comments.filter(keyset_filter(COMMENT_ORDERING, values, True))
+    rows = list(comments.order_by(*COMMENT_ORDERING)[:limit + 1])
+    next_cursor = comment_cursor(rows[limit - 1]) if len(rows) > limit else ''
+    return rows[:limit][::-1], next_cursor
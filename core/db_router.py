@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+
+
+# url names whose GET requests only read and can tolerate a little replication lag
+READ_ONLY_VIEWS = {
+    'home', 'profile', 'events', 'updates', 'forum',
+    'event_detail', 'update_detail', 'forum_detail', 'user_profile',
+    'global_search', 'search_autocomplete', 'admin_dashboard', 'event_calendar_feed', 'media',
+}
+
+PIN_COOKIE = 'db_pin_primary'
+
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# alias of the replica the current request reads from, or None for the primary
+_use_replica = ContextVar('use_replica', default=None)
+
+
+class ReplicaHealth:
+    """Remembers which replicas failed a probe or a read so they are skipped for a while."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = {}
+        self._down_until = {}
+
+    def healthy(self, alias):
+        now = time.monotonic()
+        if self._down_until.get(alias, 0) > now:
+            return False
+        if now - self._checked_at.get(alias, 0) < settings.REPLICA_CHECK_INTERVAL:
+            return True
+        with self._lock:
+            self._checked_at[alias] = now
+        try:
+            with connections[alias].cursor() as cursor:
+                # an empty or unmigrated SQLite file still answers SELECT 1
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+        except DatabaseError:
+            self.mark_down(alias)
+            return False
+        return True
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+
+health = ReplicaHealth()
+
+
+def pick_replica():
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if health.healthy(alias)]
+    return random.choice(candidates) if candidates else None
+
+
+class ReplicaRouter:
+    """Send reads from read-only views to the replica picked for the request; everything else uses the primary."""
+
+    def db_for_read(self, model, **hints):
+        # sessions are written on login and read on the very next request
+        alias = _use_replica.get()
+        if alias and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema from the primary through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Flags read-only GETs for the router and pins a client to the primary after it writes.
+
+    The pin is a short-lived cookie, so read-your-writes holds across workers
+    for REPLICA_STICKY_SECONDS after any POST. A replica that fails a read
+    between health probes is marked down at once and the view is run again
+    against the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _use_replica.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and settings.DATABASE_REPLICAS:
+            sticky = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(PIN_COOKIE, str(int(time.time() + sticky)), max_age=sticky,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS or request.method not in ('GET', 'HEAD'):
+            return None
+        match = request.resolver_match
+        if match is None or match.url_name not in READ_ONLY_VIEWS:
+            return None
+        try:
+            pinned = int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        if not pinned:
+            _use_replica.set(pick_replica())
+        return None
+
+    def process_exception(self, request, exception):
+        alias = _use_replica.get()
+        if alias is None or not isinstance(exception, OperationalError):
+            return None
+        health.mark_down(alias)
+        _use_replica.set(None)
+        # only READ_ONLY_VIEWS GETs get here, so running the view again is safe
+        match = request.resolver_match
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        return response
@@ -0,0 +1,74 @@
+import csv
+from collections import defaultdict
+
+from .models import ClubOrg
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+# cells starting with these are formulas to Excel/Sheets; every column is user-entered text
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('student_number', 'Student Number'),
+    ('full_name', 'Full Name'),
+    ('degree', 'Degree'),
+    ('year_graduated', 'Year Graduated'),
+    ('address', 'Address'),
+    ('current_address', 'Current Address'),
+    ('email', 'Email'),
+    ('contact_number', 'Contact Number'),
+    ('employment_status', 'Employment Status'),
+]
+
+
+class Echo:
+    """File-like object for csv.writer that hands each row back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _clubs(user_ids):
+    clubs = defaultdict(list)
+    for user_id, org_name in ClubOrg.objects.filter(user_id__in=user_ids).values_list('user_id', 'org_name'):
+        clubs[user_id].append(org_name)
+    return clubs
+
+
+def _cell(value):
+    """A CSV cell; text a spreadsheet would run as a formula is prefixed with a quote."""
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _chunk_rows(writer, chunk):
+    clubs = _clubs([row[0] for row in chunk])
+    for row in chunk:
+        # the last column is the current job's title, joined in by iter_user_csv
+        yield writer.writerow([_cell(value) for value in row] + [_cell('; '.join(clubs.get(row[0], [])))])
+
+
+def iter_user_csv(users, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the alumni directory as CSV lines.
+
+    Users are read with a server-side iterator over plain tuples, with the
+    current job joined in and clubs looked up once per chunk, so memory does
+    not grow with the export.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([label for _, label in EXPORT_COLUMNS] + ['Current Job', 'Clubs/Orgs'])
+
+    fields = [name for name, _ in EXPORT_COLUMNS] + ['current_job__job_title']
+    chunk = []
+    for row in users.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _chunk_rows(writer, chunk)
+            chunk = []
+    if chunk:
+        yield from _chunk_rows(writer, chunk)
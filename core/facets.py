@@ -0,0 +1,120 @@
+from django.db.models import Count, Q
+
+from .models import ClubOrg, CustomUser
+
+
+FACET_LIMIT = 15  # values shown per facet, most common first
+
+USER_FACETS = [
+    ('degree', 'Degree'),
+    ('batch', 'Batch'),
+    ('employment_status', 'Employment'),
+    ('club', 'Club/Org'),
+    ('job', 'Current Job'),
+]
+
+# facets that live directly on CustomUser, by GET parameter -> model field
+USER_FIELDS = {
+    'degree': 'degree',
+    'batch': 'year_graduated',
+    'employment_status': 'employment_status',
+}
+
+FACET_LABELS = {
+    'degree': dict(CustomUser.degree_choices),
+    'employment_status': dict(CustomUser.EMPLOYMENT_STATUS_CHOICES),
+}
+
+
+def selected_facets(params):
+    """Read the facet filters out of a GET/POST QueryDict: {facet: [values]}."""
+    selected = {}
+    for name, _ in USER_FACETS:
+        values = [v for v in params.getlist(name) if v]
+        if name == 'batch':
+            values = [v for v in values if v.isdigit()]
+        if values:
+            selected[name] = values
+    return selected
+
+
+def _facet_filter(name, values):
+    if name in USER_FIELDS:
+        return Q(**{f'{USER_FIELDS[name]}__in': values})
+    # clubs go through a subquery so a user with several rows is not duplicated
+    if name == 'club':
+        return Q(id__in=ClubOrg.objects.filter(org_name__in=values).values('user_id'))
+    return Q(current_job__job_title__in=values)
+
+
+def apply_facets(users, selected, exclude=None):
+    """AND across facets, OR within one; `exclude` leaves one facet out for its own counts."""
+    for name, values in selected.items():
+        if name != exclude:
+            users = users.filter(_facet_filter(name, values))
+    return users
+
+
+def _grouped_counts(name, users, values=None):
+    """(value, count) rows, most common first: the top FACET_LIMIT, or just `values` when given."""
+    if name in USER_FIELDS:
+        field = USER_FIELDS[name]
+        rows = users.order_by().filter(**{f'{field}__isnull': False})
+        if name != 'batch':
+            rows = rows.exclude(**{field: ''})
+        rows = rows.values_list(field).annotate(n=Count('id'))
+    elif name == 'club':
+        field = 'org_name'
+        rows = (
+            ClubOrg.objects.filter(user__in=users.values('id'))
+            .values_list(field).annotate(n=Count('user_id', distinct=True))
+        )
+    else:
+        # one current job per user, so a plain join counts each user once
+        field = 'current_job__job_title'
+        rows = users.order_by().filter(current_job__isnull=False).values_list(field).annotate(n=Count('id'))
+    if values is not None:
+        return list(rows.filter(**{f'{field}__in': values}).order_by('-n', field))
+    return list(rows.order_by('-n', field)[:FACET_LIMIT])
+
+
+def _with_selected(name, users, rows, chosen):
+    # a selected value outside the top FACET_LIMIT must stay listed, or it could never be unticked
+    shown = {str(value) for value, _ in rows}
+    missing = [value for value in chosen if value not in shown]
+    if not missing:
+        return rows
+    found = _grouped_counts(name, users, missing)
+    counted = {str(value) for value, _ in found}
+    return rows + found + [(value, 0) for value in missing if value not in counted]
+
+
+def facet_counts(users, selected, params):
+    """One grouped COUNT query per facet.
+
+    Each facet is counted with every *other* active filter applied, so picking a
+    degree still shows how many alumni the other degrees would add. `params`
+    is the request's QueryDict, used to build the toggle link for each value.
+    """
+    facets = []
+    for name, label in USER_FACETS:
+        chosen = selected.get(name, [])
+        options = []
+        others = apply_facets(users, selected, exclude=name)
+        for value, count in _with_selected(name, others, _grouped_counts(name, others), chosen):
+            value = str(value)
+            toggled = params.copy()
+            toggled.pop('page', None)
+            values = [v for v in toggled.getlist(name) if v != value]
+            if value not in chosen:
+                values.append(value)
+            toggled.setlist(name, values)
+            options.append({
+                'value': value,
+                'label': FACET_LABELS.get(name, {}).get(value, value),
+                'count': count,
+                'selected': value in chosen,
+                'toggle_query': toggled.urlencode(),
+            })
+        facets.append({'name': name, 'label': label, 'options': options})
+    return facets
@@ -0,0 +1,205 @@
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.db import IntegrityError, transaction
+
+from .models import CanonicalJobTitle, JobTitleTrigram
+
+
+MATCH_THRESHOLD = 0.7  # minimum trigram similarity for a new entry to reuse an existing title
+CATCH_UP_SECONDS = 5  # how often the index loads titles other workers created
+VERIFY_SECONDS = 60  # how often the index checks that no title it holds was deleted (a --rebuild elsewhere)
+
+# expanded before matching so "software engr." and "SWE" land on "software engineer"
+ABBREVIATIONS = {
+    'swe': 'software engineer',
+    'sde': 'software developer',
+    'qa': 'quality assurance',
+    'ui': 'user interface',
+    'ux': 'user experience',
+    'it': 'information technology',
+    'engr': 'engineer',
+    'eng': 'engineer',
+    'dev': 'developer',
+    'devs': 'developers',
+    'mgr': 'manager',
+    'asst': 'assistant',
+    'assoc': 'associate',
+    'sr': 'senior',
+    'jr': 'junior',
+    'admin': 'administrator',
+    'sys': 'systems',
+    'prog': 'programmer',
+    'tech': 'technician',
+}
+
+_WORD_RE = re.compile(r'[a-z0-9+#]+')
+
+
+def normalize_title(title):
+    """Lowercase, drop punctuation and expand known abbreviations."""
+    words = _WORD_RE.findall(title.lower())
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words)
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """In-memory inverted index of canonical titles by trigram.
+
+    Built once per process from JobTitleTrigram. Every CATCH_UP_SECONDS a
+    lookup first loads any titles with a pk above the highest one it has seen,
+    so titles other workers created are found too (pks only grow, so this is
+    one indexed range query); in between, an exact duplicate is still caught by
+    the unique key when it is created. Every VERIFY_SECONDS it also counts the titles it holds against
+    the table and reloads from scratch if some were deleted. Lookups only touch
+    titles that share a trigram with the query, so they stay fast with tens of
+    thousands of titles.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._postings = defaultdict(set)
+        self._sizes = {}
+        self._by_key = {}
+        self._titles = {}
+        self._max_pk = 0
+        self._verified_at = 0
+        self._caught_up_at = 0
+
+    def _fresh(self):
+        return self._loaded and time.monotonic() - self._caught_up_at < CATCH_UP_SECONDS
+
+    def _ensure_loaded(self):
+        if self._fresh():
+            return
+        with self._lock:
+            if self._fresh():
+                return
+            self._caught_up_at = time.monotonic()
+            if not self._loaded:
+                self._load(CanonicalJobTitle.objects.all(), JobTitleTrigram.objects.all())
+                self._loaded = True
+                self._verified_at = time.monotonic()
+                return
+            if time.monotonic() - self._verified_at > VERIFY_SECONDS:
+                self._verified_at = time.monotonic()
+                held = sum(1 for pk in self._titles if pk <= self._max_pk)
+                if CanonicalJobTitle.objects.filter(pk__lte=self._max_pk).count() != held:
+                    self._clear()
+                    self._load(CanonicalJobTitle.objects.all(), JobTitleTrigram.objects.all())
+                    return
+            new = CanonicalJobTitle.objects.filter(pk__gt=self._max_pk)
+            self._load(new, JobTitleTrigram.objects.filter(canonical_title__in=new))
+
+    def _load(self, titles, grams):
+        # call with _lock held; titles this process added itself may come round again, which is harmless
+        loaded = set()
+        for pk, title, key in titles.values_list('id', 'title', 'key').iterator():
+            self._by_key[key] = pk
+            self._titles[pk] = title
+            self._max_pk = max(self._max_pk, pk)
+            loaded.add(pk)
+        if not loaded:
+            return
+        for pk in loaded:
+            self._sizes[pk] = 0
+        for trigram, pk in grams.values_list('trigram', 'canonical_title_id').iterator():
+            if pk in loaded:
+                self._postings[trigram].add(pk)
+                self._sizes[pk] += 1
+
+    def add(self, canonical):
+        self._ensure_loaded()
+        grams = trigrams(canonical.key)
+        with self._lock:
+            self._by_key[canonical.key] = canonical.pk
+            self._titles[canonical.pk] = canonical.title
+            self._sizes[canonical.pk] = len(grams)
+            for gram in grams:
+                self._postings[gram].add(canonical.pk)
+
+    def get_by_key(self, key):
+        self._ensure_loaded()
+        with self._lock:
+            return self._by_key.get(key)
+
+    def search(self, text, limit=10, threshold=0.3):
+        """Return [(canonical_id, title, similarity)] best first, using Jaccard similarity of trigrams."""
+        self._ensure_loaded()
+        key = normalize_title(text)
+        if not key:
+            return []
+        grams = trigrams(key)
+        size = len(grams)
+        # add() and reloads mutate the postings sets in place, so the tally runs under the lock
+        with self._lock:
+            # Counter over the chained postings does the per-title tally in C
+            shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+            sizes = self._sizes
+            scored = []
+            for pk, count in shared.items():
+                similarity = count / (size + sizes[pk] - count)
+                if similarity >= threshold:
+                    scored.append((similarity, pk))
+            best = heapq.nlargest(limit, scored)
+            return [(pk, self._titles[pk], similarity) for similarity, pk in best]
+
+    def _clear(self):
+        self._postings.clear()
+        self._sizes.clear()
+        self._by_key.clear()
+        self._titles.clear()
+        self._max_pk = 0
+
+    def reset(self):
+        with self._lock:
+            self._loaded = False
+            self._caught_up_at = 0
+            self._clear()
+
+
+index = TrigramIndex()
+
+
+def _create_canonical(title, key):
+    try:
+        with transaction.atomic():
+            canonical = CanonicalJobTitle.objects.create(title=title, key=key)
+            JobTitleTrigram.objects.bulk_create(
+                JobTitleTrigram(trigram=gram, canonical_title=canonical) for gram in trigrams(key)
+            )
+    except IntegrityError:
+        # another worker created the same title since our index was loaded
+        canonical = CanonicalJobTitle.objects.get(key=key)
+    index.add(canonical)
+    return canonical
+
+
+def canonical_title_id(title):
+    """Id of the CanonicalJobTitle a free-text title maps to, creating one when nothing is close enough."""
+    key = normalize_title(title)
+    if not key:
+        return None
+
+    pk = index.get_by_key(key)
+    if pk is None:
+        matches = index.search(title, limit=1, threshold=MATCH_THRESHOLD)
+        if matches:
+            pk = matches[0][0]
+    if pk is None:
+        pk = _create_canonical(' '.join(word.capitalize() for word in key.split()), key).pk
+    return pk
+
+
+def matching_title_ids(text, limit=50):
+    """Canonical title ids whose names fuzzily match `text`, for search filters."""
+    return [pk for pk, _, _ in index.search(text, limit=limit)]
@@ -0,0 +1,47 @@
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+
+
+def _cursor_value(value):
+    # isoformat keeps microseconds, which DjangoJSONEncoder would round away
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    """An opaque, URL-safe token for the sort-key values of a page's boundary row."""
+    raw = json.dumps([_cursor_value(v) for v in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(token, size):
+    """The `size` values packed into `token`, or None if it is missing or malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def keyset_filter(ordering, values, forward):
+    """Rows strictly after (or before) `values` under `ordering`, as a lexicographic OR of ANDs."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            term &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= term
+    return condition
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
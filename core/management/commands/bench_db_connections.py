@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request latency of a trivial query with a fresh connection per request "
+        "against the configured persistent/pooled connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        connection = connections[alias]
+        configured_max_age = connection.settings_dict['CONN_MAX_AGE']
+        db_options = connection.settings_dict.setdefault('OPTIONS', {})
+        pooled = bool(db_options.get('pool'))
+
+        # the baseline opens a real connection per request, so the pool is switched off for it too
+        connection.close()
+        pool_options = db_options.pop('pool', None)
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        try:
+            fresh = self._measure(connection, options['requests'])
+        finally:
+            connection.close()
+            if pool_options is not None:
+                db_options['pool'] = pool_options
+            connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
+        configured = self._measure(connection, options['requests'])
+
+        mode = 'pool' if pooled else f'CONN_MAX_AGE={configured_max_age}'
+        self.stdout.write(f"{connection.vendor} ({alias}), {options['requests']} requests")
+        self._report('new connection per request', fresh)
+        self._report(f'configured ({mode})', configured)
+
+    def _measure(self, connection, count):
+        timings = []
+        for _ in range(count):
+            # the same signals Django sends around every request drive connection reuse
+            request_started.send(sender=self.__class__)
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            timings.append(time.perf_counter() - started)
+            request_finished.send(sender=self.__class__)
+        timings.sort()
+        return timings
+
+    def _report(self, label, timings):
+        mean = sum(timings) / len(timings) * 1000
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+        self.stdout.write(f"  {label:<32} mean {mean:.3f} ms  p99 {p99:.3f} ms")
@@ -0,0 +1,44 @@
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from core import ratelimit
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of RateLimitMiddleware for each bucket store (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=1000, help="distinct users/IPs to spread requests over")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        middleware = ratelimit.RateLimitMiddleware(lambda request: None)
+        requests = []
+        for i in range(options['users']):
+            request = factory.post('/like-post/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+            request.user = SimpleNamespace(is_authenticated=True, pk=i)
+            request.resolver_match = resolve('/like-post/')
+            requests.append(request)
+
+        # generous buckets so every request takes the full allowed path
+        limits = {'like_post_ajax': {'user': (10 ** 9, 1.0), 'ip': (10 ** 9, 1.0)}}
+        for store in ('local', 'cache'):
+            with override_settings(RATE_LIMIT_STORE=store, RATE_LIMITS=limits, RATE_LIMIT_ENABLED=True):
+                ratelimit._store = None
+                elapsed = self._run(middleware, requests, options['requests'])
+            self.stdout.write(f"{store:<6} {elapsed / options['requests'] * 1e6:.2f} us per request")
+        ratelimit._store = None
+
+    def _run(self, middleware, requests, count):
+        n = len(requests)
+        started = time.perf_counter()
+        for i in range(count):
+            request = requests[i % n]
+            if middleware.process_view(request, None, (), {}) is not None:
+                raise RuntimeError('request was unexpectedly rate limited')
+        return time.perf_counter() - started
@@ -0,0 +1,43 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.recommendations import FeatureIndex
+
+
+class Command(BaseCommand):
+    help = "Time a full recommendation ranking over synthetic alumni (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alumni', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        degrees = [f'DEG{i}' for i in range(12)]
+        years = list(range(1990, 2026))
+        clubs = [f'club {i}' for i in range(800)]
+        # job titles follow a long tail: a few very common, most rare
+        titles = list(range(5000))
+        weights = [1 / (rank + 1) for rank in range(len(titles))]
+
+        features = {}
+        for pk in range(1, options['alumni'] + 1):
+            feats = {('batch', rng.choice(years)), ('degree', rng.choice(degrees))}
+            feats.update(('club', club) for club in rng.sample(clubs, rng.randint(0, 3)))
+            feats.update(('job', title) for title in rng.choices(titles, weights, k=rng.randint(0, 2)))
+            features[pk] = feats
+
+        started = time.perf_counter()
+        index = FeatureIndex(features)
+        built = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for pk in features:
+            index.rank(pk)
+        ranked = time.perf_counter() - started
+
+        count = len(features)
+        self.stdout.write(f"{count} alumni: index built in {built:.1f}s, ranked in {ranked:.1f}s "
+                          f"({ranked / count * 1000:.2f} ms per alumnus)")
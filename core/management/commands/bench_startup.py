@@ -0,0 +1,65 @@
+import json
+import statistics
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import BYTECODE_WARNING, parse_importtime, run_cold_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a worker's cold start (WSGI application plus URLconf) in fresh interpreters. "
+        "Exits non-zero when the median exceeds --max-ms or regresses past a saved --baseline, for CI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=10)
+        parser.add_argument('--max-ms', type=float, help='fail when the median cold start is slower than this')
+        parser.add_argument('--baseline', help='JSON file holding a previous median to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='allowed slowdown over the baseline, as a fraction (default 0.2)')
+        parser.add_argument('--save-baseline', action='store_true', help='write this run\'s median to --baseline')
+        parser.add_argument('--forbid', action='append', default=[],
+                            help='fail if this module is imported during cold start (repeatable), e.g. PIL')
+
+    def handle(self, *args, **options):
+        if sys.dont_write_bytecode:
+            self.stderr.write(BYTECODE_WARNING)
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline needs --baseline')
+
+        run_cold_start()  # warm the OS file cache and .pyc files so the first run is not an outlier
+        timings = sorted(run_cold_start()[0] * 1000 for _ in range(options['runs']))
+        median = statistics.median(timings)
+        self.stdout.write(
+            f"cold start over {len(timings)} runs: median {median:.1f} ms, "
+            f"min {timings[0]:.1f} ms, max {timings[-1]:.1f} ms"
+        )
+
+        failures = []
+        if options['forbid']:
+            imported = {module for module, _, _, _ in parse_importtime(run_cold_start(importtime=True)[1])}
+            for module in options['forbid']:
+                if module in imported:
+                    failures.append(f'{module} is imported at start-up; import it where it is used')
+
+        if options['max_ms'] is not None and median > options['max_ms']:
+            failures.append(f"median {median:.1f} ms exceeds the {options['max_ms']:.1f} ms budget")
+
+        if options['baseline']:
+            if options['save_baseline']:
+                with open(options['baseline'], 'w') as f:
+                    json.dump({'median_ms': round(median, 2)}, f)
+                self.stdout.write(f"baseline saved to {options['baseline']}")
+            else:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)['median_ms']
+                limit = baseline * (1 + options['tolerance'])
+                self.stdout.write(f"baseline {baseline:.1f} ms, limit {limit:.1f} ms")
+                if median > limit:
+                    failures.append(f'median {median:.1f} ms regressed past {limit:.1f} ms')
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('start-up within budget'))
@@ -0,0 +1,57 @@
+import random
+import string
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from core.typeahead import Entry, PrefixIndex, _terms
+
+
+FIRST_NAMES = ['juan', 'maria', 'jose', 'ana', 'mark', 'angel', 'john', 'grace', 'paolo', 'kim', 'carlo', 'bea']
+LAST_NAMES = ['santos', 'reyes', 'cruz', 'bautista', 'garcia', 'mendoza', 'torres', 'flores', 'ramos', 'aquino']
+
+
+class Command(BaseCommand):
+    help = "Benchmark typeahead lookups and memory on a synthetic index (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=200000)
+        parser.add_argument('--queries', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        def records():
+            for pk in range(options['entries']):
+                suffix = ''.join(rng.choices(string.ascii_lowercase, k=3))
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{suffix}"
+                visibility = rng.choice(['public', 'public', 'batch', 'degree'])
+                entry = Entry('user', name, f'/users/{pk}/', visibility, [rng.randint(2016, 2025)], ['BSCS'])
+                yield 'user', pk, _terms(name, f'{2000000 + pk}'), entry
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = PrefixIndex()
+        index.load(records())
+        build_seconds = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        user = SimpleNamespace(is_staff=False, year_graduated=2020, degree='BSCS')
+        prefixes = [rng.choice(FIRST_NAMES + LAST_NAMES)[:rng.randint(1, 4)] for _ in range(options['queries'])]
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.search(prefix, user)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+
+        def pct(p):
+            return timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+
+        self.stdout.write(f"entries: {options['entries']}  keys: {len(index)}  build: {build_seconds:.2f}s")
+        self.stdout.write(f"memory: {current / 1048576:.1f} MiB resident, {peak / 1048576:.1f} MiB peak during build")
+        self.stdout.write(f"lookup: p50 {pct(0.5):.3f} ms  p99 {pct(0.99):.3f} ms  max {timings[-1] * 1000:.3f} ms")
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.recommendations import CHUNK_SIZE, recompute_all
+
+
+class Command(BaseCommand):
+    help = "Recompute every alumnus's \"alumni you may know\" list. Meant to run nightly from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help="Users ranked and written per transaction.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(done, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {done}/{total}")
+
+        count = recompute_all(chunk_size=options['chunk_size'], progress=progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Recomputed recommendations for {count} alumni in {elapsed:.1f}s."))
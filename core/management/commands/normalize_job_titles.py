@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search_cache
+from core.job_titles import canonical_title_id, index
+from core.models import CanonicalJobTitle, JobEntry
+
+
+class Command(BaseCommand):
+    help = "Map every JobEntry to a canonical job title, optionally rebuilding the title dictionary first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Drop all canonical titles and trigrams and build them again from the entries.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['rebuild']:
+            with transaction.atomic():
+                JobEntry.objects.update(canonical_title=None)
+                CanonicalJobTitle.objects.all().delete()
+            index.reset()
+
+        changed = 0
+        batch = []
+        entries = JobEntry.objects.order_by('pk').values_list('pk', 'job_title', 'canonical_title_id')
+        for pk, title, current in entries.iterator(chunk_size=batch_size):
+            new = canonical_title_id(title) if title else None
+            if new != current:
+                batch.append(JobEntry(pk=pk, canonical_title_id=new))
+            if len(batch) >= batch_size:
+                changed += self._flush(batch)
+                batch = []
+        changed += self._flush(batch)
+
+        # bulk_update sends no post_save, so cached job-title searches are retired here
+        search_cache.bump('jobentry')
+        titles = CanonicalJobTitle.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} job entries; {titles} canonical titles."))
+
+    def _flush(self, batch):
+        if batch:
+            JobEntry.objects.bulk_update(batch, ['canonical_title'])
+        return len(batch)
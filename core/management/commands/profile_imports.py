@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.startup import BYTECODE_WARNING, aggregate, parse_importtime, run_cold_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile a worker's cold start with `python -X importtime` and report where the "
+        "import time goes, per module or summed per package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5,
+                            help='fresh interpreters to profile; each module keeps its fastest run')
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--depth', type=int, default=0,
+                            help='sum self time per package prefix of this many dotted parts (0: per module)')
+
+    def handle(self, *args, **options):
+        if sys.dont_write_bytecode:
+            self.stderr.write(BYTECODE_WARNING)
+        best = {}
+        walls = []
+        for _ in range(options['runs']):
+            seconds, stderr = run_cold_start(importtime=True)
+            walls.append(seconds)
+            for name, (self_us, count) in aggregate(parse_importtime(stderr), options['depth'] or None).items():
+                # the fastest run is the one least disturbed by the rest of the machine
+                if name not in best or self_us < best[name][0]:
+                    best[name] = (self_us, count)
+
+        total = sum(self_us for self_us, _ in best.values())
+        self.stdout.write(
+            f"{len(best)} {'packages' if options['depth'] else 'modules'}, "
+            f"{total / 1000:.1f} ms of import time, cold start {min(walls) * 1000:.1f} ms (best of {len(walls)})"
+        )
+        self.stdout.write(f"  {'self ms':>8}  {'share':>6}  {'modules':>7}  name")
+        for name, (self_us, count) in sorted(best.items(), key=lambda item: -item[1][0])[:options['top']]:
+            self.stdout.write(f"  {self_us / 1000:8.2f}  {self_us / total:6.1%}  {count:7d}  {name}")
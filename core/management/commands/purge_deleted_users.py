@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.bulk import BULK_CHUNK_SIZE, purge_user
+from core.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Hard-delete soft-deleted users and their forum posts, likes, comments, jobs and clubs in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=0,
+                            help="Only purge users soft-deleted at least this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=BULK_CHUNK_SIZE,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help="Seconds to sleep between batches so live requests can take the write lock.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        users = CustomUser.objects.filter(deleted_at__isnull=False, deleted_at__lte=cutoff)
+
+        purged = 0
+        for user in users.iterator():
+            purge_user(user, batch_size=options['batch_size'], pause=options['pause'])
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} deleted users."))
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from core.models import CustomUser, Event, Forum
+from core.toggles import record_interest, record_like
+from core.write_behind import buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer like/interest toggles from many threads and count 'database is locked' errors. "
+        "Runs against a throwaway, freshly migrated SQLite file, never the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=100)
+        parser.add_argument('--writes', type=int, default=20, help="Toggles per writer.")
+        parser.add_argument('--queue', action='store_true', help="Route writes through the SQLite write queue.")
+        parser.add_argument('--write-behind', action='store_true', help="Buffer toggles and write them in batches.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('stress_sqlite_writes needs the SQLite backend.')
+        settings.SQLITE_WRITE_QUEUE = options['queue']
+        settings.WRITE_BEHIND = options['write_behind']
+
+        # a scratch database file with the same schema and connection options as the real one;
+        # every thread's connection picks up the switched NAME
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        old_test_name = test_settings.get('NAME')
+        with tempfile.TemporaryDirectory(prefix='stress-sqlite-') as scratch:
+            test_settings['NAME'] = os.path.join(scratch, 'stress.sqlite3')
+            old_name = connection.settings_dict['NAME']
+            # close() keeps an in-memory database (the test runner's) open, so set it aside
+            # for the run instead of letting this thread keep using it
+            parked = None
+            if connection.is_in_memory_db():
+                parked, connection.connection = connection.connection, None
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self.stress(options)
+            finally:
+                # drops the scratch file and points the connection back, however the run ended
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = old_test_name
+                if parked is not None:
+                    connection.connection = parked
+
+    def stress(self, options):
+        writers = options['writers']
+        users = [
+            CustomUser.objects.create_user(f'stress-{i}', password='x', full_name=f'Stress {i}')
+            for i in range(writers)
+        ]
+        post = Forum.objects.create(title='stress', content='stress', author=users[0])
+        event = Event.objects.create(title='stress', description='stress')
+
+        locked = []
+        other = []
+        barrier = threading.Barrier(writers)
+
+        def writer(user):
+            barrier.wait()
+            try:
+                for i in range(options['writes']):
+                    try:
+                        if i % 2:
+                            record_interest(user, event)
+                        else:
+                            record_like(user, post)
+                    except OperationalError as exc:
+                        (locked if 'locked' in str(exc) else other).append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # buffered toggles only count once they are in the database
+        while buffer.flush():
+            pass
+        elapsed = time.perf_counter() - started
+
+        # every user toggles each target a known number of times, so the end state is predictable
+        likes, interested = post.likes.count(), event.interested.count()
+        expected_likes = writers * (((options['writes'] + 1) // 2) % 2)
+        expected_interested = writers * ((options['writes'] // 2) % 2)
+
+        total = writers * options['writes']
+        self.stdout.write(f"{writers} writers, {total} toggles in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+        self.stdout.write(f"lock errors: {len(locked)}  other database errors: {len(other)}")
+        self.stdout.write(
+            f"final likes: {likes} (expected {expected_likes})  "
+            f"interested: {interested} (expected {expected_interested})"
+        )
+        if locked or other:
+            raise CommandError(
+                f"{len(locked)} lock errors, {len(other)} other database errors; first: {(locked + other)[0]}"
+            )
+        if (likes, interested) != (expected_likes, expected_interested):
+            raise CommandError("Toggles were lost: the final counts do not match the expected ones.")
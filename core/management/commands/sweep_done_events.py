@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import search_cache
+from core.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark every event that has already started as done in a single UPDATE. "
+        "Run it from cron, or keep it running with --every."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=0,
+                            help="Repeat every this many seconds instead of sweeping once.")
+
+    def handle(self, *args, **options):
+        while True:
+            now = timezone.now()
+            swept = Event.objects.filter(done=False, starts_at__lte=now).update(done=True, updated_at=now)
+            if swept:
+                search_cache.bump('event')
+            self.stdout.write(f"Marked {swept} past events as done.")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
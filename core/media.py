@@ -0,0 +1,166 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from .models import CustomUser
+
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+_PROFILE_PIC_RE = re.compile(r'^profile_pictures/user_(\d+)/')
+
+
+def resolve(path):
+    """Absolute path of a file under MEDIA_ROOT, or Http404 for anything outside it or missing."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def can_view(user, path):
+    """Any signed-in user may see media; pictures of soft-deleted users are left to staff."""
+    if not user.is_authenticated:
+        return False
+    match = _PROFILE_PIC_RE.match(path)
+    if match and not user.is_staff:
+        return CustomUser.objects.live().filter(pk=int(match.group(1))).exists()
+    return True
+
+
+def file_etag(stat):
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def byte_range(request, size, etag):
+    """(start, end) inclusive for a single satisfiable Range header, None to send the whole file.
+
+    Raises ValueError for a range that lies outside the file (answered with 416).
+    Multi-range requests and stale If-Range validators get the whole file.
+    """
+    header = request.headers.get('Range', '')
+    if not header or request.headers.get('If-Range', etag) != etag:
+        return None
+    match = _RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+class FileRange:
+    """A window [start, start + length) of an open file, seen as a whole file.
+
+    FileResponse sizes the response from tell()/seek(), and servers with a
+    sendfile-capable wsgi.file_wrapper (gunicorn) send from the real file
+    descriptor at its current offset, so the copy still happens in the kernel.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.start = start
+        self.end = start + length
+        file.seek(start)
+
+    def read(self, size=-1):
+        remaining = self.end - self.file.tell()
+        if remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.file.read(size)
+
+    def tell(self):
+        return self.file.tell() - self.start
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: self.start, os.SEEK_CUR: self.file.tell(), os.SEEK_END: self.end}[whence]
+        return self.file.seek(base + offset) - self.start
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _offload(path, full_path, content_type):
+    """Empty response telling the front server to send the file itself, or None without one."""
+    mode = settings.MEDIA_SENDFILE
+    if not mode:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = full_path
+    else:
+        raise ValueError(f'Unknown MEDIA_SENDFILE mode {mode!r}')
+    return response
+
+
+def media_response(request, path):
+    """Serve one authorized media file: offloaded to nginx/Apache when configured, else streamed by Django."""
+    full_path = resolve(path)
+    if not can_view(request.user, path):
+        raise Http404
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    cache_control = f'private, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+    # the front server handles Range and conditional requests for offloaded files
+    response = _offload(path, full_path, content_type)
+    if response is not None:
+        response['Cache-Control'] = cache_control
+        return response
+
+    stat = os.stat(full_path)
+    etag = file_etag(stat)
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            window = byte_range(request, stat.st_size, etag)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        file = open(full_path, 'rb')
+        if window is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = window
+            response = FileResponse(FileRange(file, start, end - start + 1), content_type=content_type, status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Accept-Ranges'] = 'bytes'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
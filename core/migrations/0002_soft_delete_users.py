@@ -0,0 +1,149 @@
+# Generated by Django 5.2 on 2026-10-19 18:56
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Batch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Degree',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='birthday',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='contact_number',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='current_address',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='year_attended',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='done',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='interested',
+            field=models.ManyToManyField(blank=True, related_name='interested_events', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='visibility_type',
+            field=models.CharField(choices=[('public', 'Public'), ('batch', 'By Batch'), ('degree', 'By Degree'), ('both', 'By Batch and Degree')], default='public', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='visibility_type',
+            field=models.CharField(choices=[('public', 'Public'), ('batch', 'By Batch'), ('degree', 'By Degree'), ('both', 'By Batch and Degree')], default='public', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='updates',
+            name='visibility_type',
+            field=models.CharField(choices=[('public', 'Public'), ('batch', 'By Batch'), ('degree', 'By Degree'), ('both', 'By Batch and Degree')], default='public', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='year_graduated',
+            field=models.IntegerField(blank=True, choices=[(2026, '2026'), (2025, '2025'), (2024, '2024'), (2023, '2023'), (2022, '2022'), (2021, '2021'), (2020, '2020'), (2019, '2019'), (2018, '2018'), (2017, '2017'), (2016, '2016')], null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='location',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='visibility_batches',
+            field=models.ManyToManyField(blank=True, to='core.batch'),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='visibility_batches',
+            field=models.ManyToManyField(blank=True, to='core.batch'),
+        ),
+        migrations.AddField(
+            model_name='updates',
+            name='visibility_batches',
+            field=models.ManyToManyField(blank=True, to='core.batch'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='visibility_degrees',
+            field=models.ManyToManyField(blank=True, to='core.degree'),
+        ),
+        migrations.AddField(
+            model_name='forum',
+            name='visibility_degrees',
+            field=models.ManyToManyField(blank=True, to='core.degree'),
+        ),
+        migrations.AddField(
+            model_name='updates',
+            name='visibility_degrees',
+            field=models.ManyToManyField(blank=True, to='core.degree'),
+        ),
+        migrations.DeleteModel(
+            name='Attendance',
+        ),
+    ]
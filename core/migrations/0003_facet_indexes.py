@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_soft_delete_users'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cluborg',
+            name='org_name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='degree',
+            field=models.CharField(blank=True, choices=[('BSCS', 'BS Computer Science'), ('BSIT', 'BS Information Technology'), ('BSEMC', 'BS Entertainment and Multimedia Computing'), ('ACT', 'Associate in Computer Technology')], db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='employment_status',
+            field=models.CharField(blank=True, choices=[('employed', 'Employed'), ('freelancing', 'Freelancing'), ('unemployed', 'Unemployed'), ('studying', 'Studying'), ('other', 'Other')], db_index=True, max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='year_graduated',
+            field=models.IntegerField(blank=True, choices=[(2026, '2026'), (2025, '2025'), (2024, '2024'), (2023, '2023'), (2022, '2022'), (2021, '2021'), (2020, '2020'), (2019, '2019'), (2018, '2018'), (2017, '2017'), (2016, '2016')], db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='jobentry',
+            index=models.Index(fields=['is_current', 'job_title'], name='jobentry_current_title_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-19 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_facet_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CanonicalJobTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobentry',
+            name='canonical_title',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_entries', to='core.canonicaljobtitle'),
+        ),
+        migrations.CreateModel(
+            name='JobTitleTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(db_index=True, max_length=3)),
+                ('canonical_title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='core.canonicaljobtitle')),
+            ],
+            options={
+                'unique_together': {('trigram', 'canonical_title')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19 19:22
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_starts_at(apps, schema_editor):
+    # same rule as Event.compute_starts_at: all-day events start when their day ends
+    Event = apps.get_model('core', 'Event')
+    tz = timezone.get_default_timezone()
+    events = []
+    for event in Event.objects.filter(date__isnull=False).only('id', 'date', 'time').iterator():
+        date, time = event.date, event.time
+        if time is None:
+            date, time = date + datetime.timedelta(days=1), datetime.time.min
+        event.starts_at = timezone.make_aware(datetime.datetime.combine(date, time), tz)
+        events.append(event)
+    Event.objects.bulk_update(events, ['starts_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_canonical_job_titles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['done', 'starts_at'], name='event_done_starts_idx'),
+        ),
+        migrations.RunPython(backfill_starts_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-19 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+DEGREE_NAMES = {
+    'BSCS': 'BS Computer Science',
+    'BSIT': 'BS Information Technology',
+    'BSEMC': 'BS Entertainment and Multimedia Computing',
+    'ACT': 'Associate in Computer Technology',
+}
+
+
+def backfill_audience_refs(apps, schema_editor):
+    # create the Batch/Degree rows users point at, then fill the keys a chunk of users at a time
+    CustomUser = apps.get_model('core', 'CustomUser')
+    Batch = apps.get_model('core', 'Batch')
+    Degree = apps.get_model('core', 'Degree')
+    max_code = Degree._meta.get_field('code').max_length
+
+    batch_ids = {}
+    for year in CustomUser.objects.filter(year_graduated__isnull=False).values_list('year_graduated', flat=True).distinct():
+        batch_ids[year] = Batch.objects.get_or_create(year=year)[0].pk
+    degree_ids = {}
+    for code in CustomUser.objects.exclude(degree='').values_list('degree', flat=True).distinct():
+        if len(code) <= max_code:
+            degree_ids[code] = Degree.objects.get_or_create(code=code, defaults={'name': DEGREE_NAMES.get(code, code)})[0].pk
+
+    last_pk = 0
+    while True:
+        users = list(
+            CustomUser.objects.filter(pk__gt=last_pk).order_by('pk')
+            .only('id', 'year_graduated', 'degree')[:BATCH_SIZE]
+        )
+        if not users:
+            break
+        for user in users:
+            user.batch_ref_id = batch_ids.get(user.year_graduated)
+            user.degree_ref_id = degree_ids.get(user.degree)
+        CustomUser.objects.bulk_update(users, ['batch_ref', 'degree_ref'])
+        last_pk = users[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alumni_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='batch_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='core.batch'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='degree_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='core.degree'),
+        ),
+        migrations.RunPython(backfill_audience_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 19:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_user_audience_refs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor_label', models.CharField(blank=True, max_length=200)),
+                ('action', models.CharField(choices=[('create', 'Created'), ('edit', 'Edited'), ('delete', 'Deleted'), ('reset_password', 'Reset password'), ('activate', 'Activated'), ('deactivate', 'Deactivated'), ('mark_done', 'Marked done'), ('import', 'Imported')], max_length=20)),
+                ('target_type', models.CharField(choices=[('user', 'User'), ('event', 'Event'), ('update', 'Update'), ('forum', 'Forum post')], max_length=20)),
+                ('target_id', models.IntegerField(blank=True, null=True)),
+                ('target_label', models.CharField(blank=True, max_length=200)),
+                ('detail', models.JSONField(blank=True, default=dict)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='audit_created_idx'), models.Index(fields=['action', 'created_at'], name='audit_action_created_idx'), models.Index(fields=['target_type', 'target_id', 'created_at'], name='audit_target_created_idx'), models.Index(fields=['actor', 'created_at'], name='audit_actor_created_idx')],
+            },
+        ),
+    ]
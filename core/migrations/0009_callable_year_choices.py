@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 19:41
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_audit_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='year_graduated',
+            field=models.IntegerField(blank=True, choices=core.models.graduation_year_choices, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-19 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+# CustomUser.ACTIVE_EMPLOYMENT_STATUSES when this migration was written
+ACTIVE_EMPLOYMENT_STATUSES = ['employed', 'freelancing', 'studying', 'other']
+
+
+def backfill_current_job(apps, schema_editor):
+    # same choice as CustomUserManager.refresh_current_job, a chunk of users at a time
+    CustomUser = apps.get_model('core', 'CustomUser')
+    JobEntry = apps.get_model('core', 'JobEntry')
+
+    last_pk = 0
+    while True:
+        users = list(
+            CustomUser.objects.filter(pk__gt=last_pk, employment_status__in=ACTIVE_EMPLOYMENT_STATUSES)
+            .order_by('pk').only('id')[:BATCH_SIZE]
+        )
+        if not users:
+            break
+        # ascending, so each user's last row is the current one
+        jobs = dict(
+            JobEntry.objects.filter(user_id__in=[user.pk for user in users])
+            .order_by('user_id', 'is_current', 'date_added', 'pk')
+            .values_list('user_id', 'pk')
+        )
+        for user in users:
+            user.current_job_id = jobs.get(user.pk)
+        CustomUser.objects.bulk_update(users, ['current_job'])
+        last_pk = users[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_callable_year_choices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='current_job',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.jobentry'),
+        ),
+        migrations.AddIndex(
+            model_name='jobentry',
+            index=models.Index(fields=['user', '-is_current', '-date_added'], name='jobentry_user_current_idx'),
+        ),
+        # the job facet now groups users by current_job, so nothing filters on (is_current, job_title)
+        migrations.RemoveIndex(
+            model_name='jobentry',
+            name='jobentry_current_title_idx',
+        ),
+        migrations.RunPython(backfill_current_job, migrations.RunPython.noop),
+    ]
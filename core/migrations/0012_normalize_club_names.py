@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def normalize_club_names(apps, schema_editor):
+    ClubOrg = apps.get_model('core', 'ClubOrg')
+    changed = []
+    for club in ClubOrg.objects.only('id', 'org_name').iterator():
+        name = ' '.join(club.org_name.split())
+        if name != club.org_name:
+            club.org_name = name
+            changed.append(club)
+    ClubOrg.objects.bulk_update(changed, ['org_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_profile_card_stamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_club_names, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,23 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager, User
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models import Q
+from django.utils import timezone
 import datetime
 from datetime import date
-from PIL import Image
+
+from . import search_cache
 
 
 
 def user_profile_pic_path(instance, filename):
     return f"profile_pictures/user_{instance.id}/{filename}"
 
+def graduation_year_choices():
+    # a callable, so the list follows the calendar instead of the year the worker started
+    return [(year, str(year)) for year in range(timezone.now().year, 2015, -1)]
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, student_number=None, password=None, **extra_fields):
         if not student_number and not extra_fields.get('is_staff'):
@@ -39,6 +46,42 @@ class CustomUserManager(BaseUserManager):
         return self.create_user(username=username, password=password, student_number=username,
                                  full_name=full_name, **extra_fields)
 
+    def live(self):
+        """Users that have not been soft-deleted (the purge command removes them later)."""
+        return self.get_queryset().filter(deleted_at__isnull=True)
+
+    def refresh_current_job(self, user_id):
+        """Re-point the user's `current_job` from their job entries and status; returns the job id.
+
+        The user row is locked for the read-then-write so concurrent job edits
+        cannot leave the pointer on a job that lost the race.
+        """
+        with transaction.atomic():
+            row = (
+                self.select_for_update().filter(pk=user_id)
+                .values_list('employment_status', 'current_job_id').first()
+            )
+            if row is None:
+                return None
+            status, old_job_id = row
+            job_id = None
+            if status in self.model.ACTIVE_EMPLOYMENT_STATUSES:
+                # explicitly current jobs win, then the most recently added one
+                job_id = (
+                    JobEntry.objects.filter(user_id=user_id)
+                    .order_by('-is_current', '-date_added', '-pk')
+                    .values_list('pk', flat=True).first()
+                )
+            if job_id != old_job_id:
+                self.filter(pk=user_id).update(current_job_id=job_id, profile_changed_at=timezone.now())
+                transaction.on_commit(lambda: search_cache.bump('customuser'))
+            return job_id
+
+    def touch_profile(self, user_id):
+        """Move the user's profile stamp, retiring their cached profile card (see core.profile_cards)."""
+        if self.filter(pk=user_id).update(profile_changed_at=timezone.now()):
+            transaction.on_commit(lambda: search_cache.bump('customuser'))
+
 
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
@@ -53,11 +96,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         ('BSEMC', 'BS Entertainment and Multimedia Computing'),
         ('ACT', 'Associate in Computer Technology'),
     ]
-    degree = models.CharField(max_length=100, choices=degree_choices, blank=True)
+    degree = models.CharField(max_length=100, choices=degree_choices, blank=True, db_index=True)
+
+    year_graduated = models.IntegerField(choices=graduation_year_choices, null=True, blank=True, db_index=True)
 
-    current_year = datetime.datetime.now().year
-    year_selection = [(year, str(year)) for year in range(current_year, 2015, -1)]  
-    year_graduated = models.IntegerField(choices=year_selection, null=True, blank=True)
+    # integer keys for visibility joins, kept in sync with degree/year_graduated on save
+    degree_ref = models.ForeignKey('Degree', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='users')
+    batch_ref = models.ForeignKey('Batch', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='users')
     
     birthday = models.DateField(null=True, blank=True)
     current_address = models.CharField(max_length=255, blank=True, null=True)
@@ -74,7 +119,12 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         ('studying', 'Studying'),
         ('other', 'Other'),
     ]
-    employment_status = models.CharField(max_length=20, choices=EMPLOYMENT_STATUS_CHOICES, blank=True, null=True)
+    employment_status = models.CharField(max_length=20, choices=EMPLOYMENT_STATUS_CHOICES, blank=True, null=True, db_index=True)
+    # statuses under which a job entry counts as the user's current job
+    ACTIVE_EMPLOYMENT_STATUSES = {'employed', 'freelancing', 'studying', 'other'}
+
+    # maintained by CustomUserManager.refresh_current_job on job and status changes
+    current_job = models.ForeignKey('JobEntry', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
 
     username = models.CharField(max_length=150, unique=True, null=True, blank=True)
 
@@ -87,6 +137,14 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # signed into the calendar feed token; bumping it revokes every link handed out before
+    calendar_token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # version stamp of everything a profile card shows; moved on saves of those
+    # fields and, through core.signals, on job and club changes
+    profile_changed_at = models.DateTimeField(default=timezone.now, editable=False)
+    PROFILE_CARD_FIELDS = {'full_name', 'profile_picture', 'degree', 'year_graduated', 'employment_status', 'current_job'}
 
     USERNAME_FIELD = 'student_number'
     REQUIRED_FIELDS = ['full_name']
@@ -103,25 +161,171 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     @property
     def batch(self):
         return self.year_graduated
+
+    @property
+    def audience_ids(self):
+        """(Batch id, Degree id) this user sees batch/degree posts for; plain ints, safe to cache."""
+        return self.batch_ref_id, self.degree_ref_id
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the values batch_ref/degree_ref were resolved from, so save() only looks them up again after a change
+        instance._loaded_audience = (instance.__dict__.get('year_graduated'), instance.__dict__.get('degree'))
+        return instance
+
+    def _audience_changed(self, field, ref_field, loaded, update_fields):
+        if update_fields is not None and field not in update_fields:
+            return False
+        if field not in self.__dict__:  # deferred and never touched, so unchanged
+            return False
+        value = self.__dict__[field]
+        return loaded is None or value != loaded or (value and getattr(self, ref_field) is None)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        loaded_year, loaded_degree = getattr(self, '_loaded_audience', (None, None))
+        if self._audience_changed('year_graduated', 'batch_ref_id', loaded_year, update_fields):
+            self.batch_ref_id = Batch.id_for(self.year_graduated)
+        if self._audience_changed('degree', 'degree_ref_id', loaded_degree, update_fields):
+            self.degree_ref_id = Degree.id_for(self.degree)
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'year_graduated' in update_fields:
+                update_fields.add('batch_ref')
+            if 'degree' in update_fields:
+                update_fields.add('degree_ref')
+            if update_fields & self.PROFILE_CARD_FIELDS:
+                update_fields.add('profile_changed_at')
+            kwargs['update_fields'] = update_fields
+        if update_fields is None or 'profile_changed_at' in update_fields:
+            self.profile_changed_at = timezone.now()
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._loaded_audience = (self.__dict__.get('year_graduated'), self.__dict__.get('degree'))
+            # a new user has no jobs yet; otherwise a status change can move the pointer
+            if not adding and (update_fields is None or 'employment_status' in update_fields):
+                self.current_job_id = CustomUser.objects.refresh_current_job(self.pk)
+
+    def soft_delete(self):
+        """Deactivate now; dependent rows are hard-deleted later by `purge_deleted_users`."""
+        self.is_active = False
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['is_active', 'deleted_at'])
     
 
     
 class ClubOrg(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='club_orgs')
-    org_name = models.CharField(max_length=100)
+    org_name = models.CharField(max_length=100, db_index=True)
+
+    @staticmethod
+    def normalize_name(name):
+        """Trim and collapse whitespace, so facets and recommendations match names exactly."""
+        return ' '.join(name.split())
+
+    def save(self, *args, **kwargs):
+        self.org_name = self.normalize_name(self.org_name)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.org_name
     
+class CanonicalJobTitle(models.Model):
+    title = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True)  # normalized form, see job_titles.normalize_title
+
+    def __str__(self):
+        return self.title
+
+
+class JobTitleTrigram(models.Model):
+    """Persisted trigram postings for CanonicalJobTitle, loaded into memory by job_titles.TrigramIndex."""
+    trigram = models.CharField(max_length=3, db_index=True)
+    canonical_title = models.ForeignKey(CanonicalJobTitle, on_delete=models.CASCADE, related_name='trigrams')
+
+    class Meta:
+        unique_together = ('trigram', 'canonical_title')
+
+
 class JobEntry(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='job_entries')
     job_title = models.CharField(max_length=100)
+    canonical_title = models.ForeignKey(CanonicalJobTitle, on_delete=models.SET_NULL, null=True, blank=True, related_name='job_entries')
     date_added = models.DateTimeField(auto_now_add=True)
     is_current = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-is_current', '-date_added'], name='jobentry_user_current_idx'),
+        ]
+
     def __str__(self):
         return self.job_title
+
+    def save(self, *args, **kwargs):
+        from .job_titles import canonical_title_id
+
+        self.canonical_title_id = canonical_title_id(self.job_title) if self.job_title else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'job_title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'canonical_title'}
+        super().save(*args, **kwargs)
     
+class AlumniRecommendation(models.Model):
+    """One precomputed "alumni you may know" entry; see core.recommendations."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('user', 'rank')
+
+    def __str__(self):
+        return f"{self.user} -> {self.recommended} (#{self.rank})"
+
+class AuditEvent(models.Model):
+    """One admin action, written in batches by core.audit."""
+    ACTION_CHOICES = [
+        ('create', 'Created'),
+        ('edit', 'Edited'),
+        ('delete', 'Deleted'),
+        ('reset_password', 'Reset password'),
+        ('activate', 'Activated'),
+        ('deactivate', 'Deactivated'),
+        ('mark_done', 'Marked done'),
+        ('import', 'Imported'),
+    ]
+    TARGET_CHOICES = [
+        ('user', 'User'),
+        ('event', 'Event'),
+        ('update', 'Update'),
+        ('forum', 'Forum post'),
+    ]
+
+    # stamped when the action is recorded, not when the batch is flushed
+    created_at = models.DateTimeField(default=timezone.now)
+    actor = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    actor_label = models.CharField(max_length=200, blank=True)  # survives the actor being purged
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    target_type = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.IntegerField(null=True, blank=True)  # None for actions over many rows
+    target_label = models.CharField(max_length=200, blank=True)
+    detail = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='audit_created_idx'),
+            models.Index(fields=['action', 'created_at'], name='audit_action_created_idx'),
+            models.Index(fields=['target_type', 'target_id', 'created_at'], name='audit_target_created_idx'),
+            models.Index(fields=['actor', 'created_at'], name='audit_actor_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.actor_label} {self.action} {self.target_type} {self.target_label}"
+
 visibility_choices = [
     ('public', 'Public'),
     ('batch', 'By Batch'),
@@ -129,6 +333,21 @@ visibility_choices = [
     ('both', 'By Batch and Degree'),
 ]
 
+AUDIENCE_ID_CACHE_TIMEOUT = 60 * 60 * 24  # cleared when a Batch/Degree is deleted, see core.signals
+
+
+def _cached_audience_id(model, key, lookup, defaults=None):
+    # the cache may be per process, so a row deleted by another worker can still be cached here;
+    # a primary-key probe confirms the hit before a user is pointed at it
+    pk = cache.get(key)
+    if pk is not None and not model.objects.filter(pk=pk).exists():
+        pk = None
+    if pk is None:
+        pk = model.objects.get_or_create(**lookup, defaults=defaults or {})[0].pk
+        cache.set(key, pk, AUDIENCE_ID_CACHE_TIMEOUT)
+    return pk
+
+
 class Degree(models.Model):
     code = models.CharField(max_length=10, unique=True)
     name = models.CharField(max_length=100)
@@ -136,19 +355,56 @@ class Degree(models.Model):
     def __str__(self):
         return str(self.code)
 
+    @classmethod
+    def cache_key(cls, code):
+        return f'audience:degree:{code}'
+
+    @classmethod
+    def id_for(cls, code):
+        """Id of the Degree row for a CustomUser.degree value, creating it if missing; None for blank codes."""
+        if not code or len(code) > cls._meta.get_field('code').max_length:
+            return None
+        name = dict(CustomUser.degree_choices).get(code, code)
+        return _cached_audience_id(cls, cls.cache_key(code), {'code': code}, {'name': name})
+
 class Batch(models.Model):
     year = models.IntegerField(unique=True)
 
     def __str__(self):
         return str(self.year)
-    
+
+    @classmethod
+    def cache_key(cls, year):
+        return f'audience:batch:{year}'
+
+    @classmethod
+    def id_for(cls, year):
+        """Id of the Batch row for a graduation year, creating it if missing; None when there is no year."""
+        if not year:
+            return None
+        year = int(year)
+        return _cached_audience_id(cls, cls.cache_key(year), {'year': year})
+
+
+def audience_q(batch_id, degree_id, only=None):
+    """Rows visible to the audience with these Batch/Degree ids; compares through-table keys only.
+
+    `only` narrows it to one visibility type. A missing id matches nothing
+    (a NULL lookup would match rows with no audience rows at all).
+    """
+    q = Q(pk__in=[])
+    if only in (None, 'public'):
+        q |= Q(visibility_type='public')
+    if only in (None, 'batch') and batch_id is not None:
+        q |= Q(visibility_type='batch', visibility_batches=batch_id)
+    if only in (None, 'degree') and degree_id is not None:
+        q |= Q(visibility_type='degree', visibility_degrees=degree_id)
+    return q
+
+
 class VisibilityManager(models.Manager):
     def user_visible(self, user):
-        return self.get_queryset().filter(
-            Q(visibility_type='public') |
-            Q(visibility_type='batch', visibility_batches__year=user.year_graduated) |
-            Q(visibility_type='degree', visibility_degrees__code=user.degree)
-        ).distinct()
+        return self.get_queryset().filter(audience_q(*user.audience_ids)).distinct()
 
 
 class Event(models.Model):
@@ -160,6 +416,9 @@ class Event(models.Model):
     done = models.BooleanField(default=False)
     interested = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='interested_events')
 
+    # derived from date/time on save so "has it started" is one indexed comparison
+    starts_at = models.DateTimeField(blank=True, null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -169,10 +428,35 @@ class Event(models.Model):
 
     objects = models.Manager()
     visible = VisibilityManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['done', 'starts_at'], name='event_done_starts_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def compute_starts_at(date, time):
+        """Aware datetime for a date/time entered in the site's time zone.
+
+        An event without a time runs all day, so it counts as started only once
+        its day is over; this matches how the events page has always treated it.
+        """
+        if date is None:
+            return None
+        if time is None:
+            date, time = date + datetime.timedelta(days=1), datetime.time.min
+        return timezone.make_aware(datetime.datetime.combine(date, time), timezone.get_default_timezone())
+
+    def save(self, *args, **kwargs):
+        self.starts_at = self.compute_starts_at(self.date, self.time)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'date', 'time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'starts_at'}
+        super().save(*args, **kwargs)
+
 class Updates(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
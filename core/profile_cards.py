@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import ClubOrg, CustomUser
+
+
+CARD_TEMPLATE = 'core/partials/profile_card.html'
+CARD_REVISION = 1  # bump with any change to CARD_TEMPLATE so cards rendered by the old one are not served
+CARD_CLUBS = 3  # club names shown on a card
+
+
+def card_key(user_id, stamp):
+    # the stamp moves whenever anything on the card changes, so a key is never stale, only unused
+    return f'profile-card:{CARD_REVISION}:{user_id}:{stamp.isoformat()}'
+
+
+def _card_users(user_ids):
+    users = list(CustomUser.objects.filter(pk__in=user_ids).select_related('current_job'))
+    clubs = defaultdict(list)
+    for user_id, org_name in ClubOrg.objects.filter(user_id__in=user_ids).order_by('org_name').values_list('user_id', 'org_name'):
+        clubs[user_id].append(org_name)
+    for user in users:
+        user.card_clubs = clubs[user.pk][:CARD_CLUBS]
+    return users
+
+
+def cards_for(users):
+    """{user id: rendered card} for `users`: one cache get_many, and for the misses one render pass and one set_many.
+
+    Only the users' ids and `profile_changed_at` are read; missing cards are
+    rendered from a single fresh query for all of them, so callers can pass
+    whatever user rows they already hold (post authors, search rows, ...).
+    """
+    cache = caches[settings.PROFILE_CARD_CACHE]
+    keys = {user.pk: card_key(user.pk, user.profile_changed_at) for user in users}
+    if not keys:
+        return {}
+    found = cache.get_many(keys.values())
+    cards = {user_id: mark_safe(found[key]) for user_id, key in keys.items() if key in found}
+
+    missing = [user_id for user_id in keys if user_id not in cards]
+    if missing:
+        rendered = {}
+        for user in _card_users(missing):
+            html = render_to_string(CARD_TEMPLATE, {'card_user': user})
+            cards[user.pk] = mark_safe(html)
+            rendered[card_key(user.pk, user.profile_changed_at)] = html
+        cache.set_many(rendered, settings.PROFILE_CARD_TIMEOUT)
+    return cards
+
+
+def attach_profile_cards(users):
+    """Set `card` on every user in `users` (repeats allowed) from one cards_for() call; returns them as a list."""
+    users = list(users)
+    cards = cards_for(users)
+    for user in users:
+        user.card = cards.get(user.pk, '')
+    return users
@@ -0,0 +1,141 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+MAX_LOCAL_BUCKETS = 50000  # past this, buckets that have refilled completely are dropped
+
+
+class LocalBucketStore:
+    """Token buckets in this process's memory: {key: [tokens, last refill time]}.
+
+    Cheap enough to run on every write request, but each worker process
+    counts separately, so the effective limit is multiplied by the worker count.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, capacity, rate, now=None):
+        """Spend one token from `key`'s bucket; return 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_LOCAL_BUCKETS:
+                    self._prune(now)
+                bucket = self._buckets[key] = [capacity, now]
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0
+            bucket[0] = tokens
+            return (1 - tokens) / rate
+
+    def _prune(self, now):
+        # a bucket idle long enough to be full again is indistinguishable from a new one
+        refill = max(
+            (capacity / rate for limits in settings.RATE_LIMITS.values() for capacity, rate in limits.values()),
+            default=0,
+        )
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < refill}
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Token buckets in the default cache, shared by every process using it.
+
+    The read-modify-write is not atomic, so a burst racing across workers can
+    get a token or two more than the capacity; good enough for abuse control.
+    """
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        cache_key = f'ratelimit:{key}'
+        tokens, last = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate
+        if not wait:
+            tokens -= 1
+        cache.set(cache_key, (tokens, now), math.ceil(capacity / rate) + 1)
+        return wait
+
+    def reset(self):
+        pass
+
+
+_stores = {'local': LocalBucketStore, 'cache': CacheBucketStore}
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = _stores[settings.RATE_LIMIT_STORE]()
+    return _store
+
+
+def client_ip(request):
+    # behind the reverse proxy REMOTE_ADDR is the proxy, so trust its header instead
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, url_name):
+    """Seconds the client must wait before `url_name` accepts another write from it, or 0."""
+    limits = settings.RATE_LIMITS.get(url_name)
+    if not limits:
+        return 0
+    store = get_store()
+    wait = 0
+    if request.user.is_authenticated and 'user' in limits:
+        wait = store.take(f'{url_name}:user:{request.user.pk}', *limits['user'])
+    if not wait and 'ip' in limits:
+        wait = store.take(f'{url_name}:ip:{client_ip(request)}', *limits['ip'])
+    return wait
+
+
+class RateLimitMiddleware:
+    """Answer 429 with Retry-After once a user or IP runs out of tokens for a rate-limited view.
+
+    Only unsafe methods are counted. Limits are configured per URL name in
+    settings.RATE_LIMITS as {'user': (capacity, tokens per second), 'ip': (...)}.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS or not settings.RATE_LIMIT_ENABLED:
+            return None
+        match = request.resolver_match
+        if match is None:
+            return None
+        wait = check(request, match.url_name)
+        if not wait:
+            return None
+
+        message = 'Too many requests. Please slow down and try again shortly.'
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.content_type == 'application/json':
+            response = JsonResponse({'success': False, 'error': message}, status=429)
+        else:
+            response = HttpResponse(message, status=429, content_type='text/plain')
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
@@ -0,0 +1,295 @@
+import heapq
+import logging
+import math
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import AlumniRecommendation, ClubOrg, CustomUser, JobEntry
+
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_COUNT = 10  # alumni stored per user
+CHUNK_SIZE = 1000  # users ranked and written per transaction in a full recompute
+REFRESH_CANDIDATES = 5000  # alumni loaded per shared feature when re-ranking one user
+
+# a feature shared by more than this share of alumni (a batch, a degree, a very
+# common job) is too broad to find candidates with; it still adds to their scores
+DENSE_FEATURE_SHARE = 0.01
+MIN_DENSE_FEATURE_DF = 100
+
+
+def _features(rows):
+    """(user id, year, degree) rows -> {user id: {feature, ...}} for batch and degree."""
+    features = {}
+    for pk, year, degree in rows:
+        feats = features[pk] = set()
+        if year:
+            feats.add(('batch', year))
+        if degree:
+            feats.add(('degree', degree))
+    return features
+
+
+def _add_clubs_and_jobs(features, clubs, jobs):
+    for user_id, org_name in clubs:
+        if user_id in features and org_name.strip():
+            features[user_id].add(('club', org_name.strip().lower()))
+    for user_id, title_id in jobs:
+        if user_id in features:
+            features[user_id].add(('job', title_id))
+
+
+def candidate_users():
+    return CustomUser.objects.live().filter(is_active=True, is_staff=False)
+
+
+class FeatureIndex:
+    """Alumni as sparse binary feature vectors, stored column-wise: {feature: {user ids}}.
+
+    Scores are the idf-weighted dot product of two users' vectors, i.e. the
+    summed rarity of everything they share. Ranking one user is one row of
+    X·Xᵀ, computed by walking the postings of that user's rare features and
+    then checking each candidate against the user's broad ones.
+    """
+
+    def __init__(self, features):
+        self.features = features
+        self.postings = defaultdict(set)
+        for pk, feats in features.items():
+            for feature in feats:
+                self.postings[feature].add(pk)
+        self.df = {feature: len(users) for feature, users in self.postings.items()}
+        self.set_total(len(features))
+        self._cohorts = {}
+
+    def set_total(self, total, df=None):
+        """Weight features by rarity among `total` alumni (more than were loaded, when ranking one user).
+
+        `df` gives the true user count of features whose postings were only
+        partly loaded.
+        """
+        total = max(total, 1)
+        self.df.update(df or {})
+        self.idf = {feature: math.log(total / max(self.df[feature], 1)) for feature in self.postings}
+        self.dense_df = max(MIN_DENSE_FEATURE_DF, int(total * DENSE_FEATURE_SHARE))
+
+    def _cohort(self, dense):
+        # users having every broad feature at once (same batch and degree, typically);
+        # shared by everyone with the same combination, so it is computed once per combination.
+        # A single broad feature is its own huge cohort and is left to the fallback in rank()
+        key = frozenset(dense)
+        if key not in self._cohorts:
+            sets = sorted((self.postings[feature] for feature in dense), key=len)
+            self._cohorts[key] = set.intersection(*sets) if sets else set()
+        return self._cohorts[key]
+
+    def rank(self, user_id, limit=RECOMMENDATION_COUNT):
+        """[(score, other user id)] best first for one user."""
+        feats = self.features.get(user_id, ())
+        sparse = [f for f in feats if self.df[f] <= self.dense_df]
+        dense = sorted((f for f in feats if self.df[f] > self.dense_df),
+                       key=lambda f: self.idf[f], reverse=True)
+
+        scores = defaultdict(float)
+        for feature in sparse:
+            weight = self.idf[feature]
+            for other in self.postings[feature]:
+                scores[other] += weight
+        cohort = self._cohort(dense) if dense else ()
+        if len(cohort) <= self.dense_df:
+            for other in cohort:
+                scores.setdefault(other, 0.0)
+        scores.pop(user_id, None)
+
+        for other in scores:
+            for feature in dense:
+                if other in self.postings[feature]:
+                    scores[other] += self.idf[feature]
+        best = heapq.nlargest(limit, ((score, other) for other, score in scores.items() if score > 0))
+
+        # too few alumni share anything rare: fall back to the broad features alone
+        for feature in dense:
+            if len(best) >= limit:
+                break
+            chosen = {other for _, other in best}
+            for other in self.postings[feature]:
+                if len(best) >= limit:
+                    break
+                if other != user_id and other not in chosen:
+                    score = sum(self.idf[f] for f in dense if other in self.postings[f])
+                    if score > 0:
+                        best.append((score, other))
+                        chosen.add(other)
+        return best
+
+    @classmethod
+    def from_database(cls):
+        users = candidate_users()
+        features = _features(users.values_list('id', 'year_graduated', 'degree').iterator())
+        _add_clubs_and_jobs(
+            features,
+            ClubOrg.objects.filter(user__in=users).values_list('user_id', 'org_name').iterator(),
+            JobEntry.objects.filter(user__in=users, canonical_title__isnull=False)
+            .values_list('user_id', 'canonical_title_id').distinct().iterator(),
+        )
+        return cls(features)
+
+
+def _store(rankings):
+    """Replace the stored recommendations of every user in `rankings` ({user id: [(score, other)]})."""
+    with transaction.atomic():
+        AlumniRecommendation.objects.filter(user_id__in=list(rankings)).delete()
+        AlumniRecommendation.objects.bulk_create([
+            AlumniRecommendation(user_id=user_id, recommended_id=other, rank=rank, score=score)
+            for user_id, best in rankings.items()
+            for rank, (score, other) in enumerate(best, start=1)
+        ], batch_size=CHUNK_SIZE)
+
+
+def recompute_all(chunk_size=CHUNK_SIZE, progress=None):
+    """Rebuild every user's recommendations from one in-memory index; returns the number of users."""
+    index = FeatureIndex.from_database()
+    user_ids = sorted(index.features)
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        _store({user_id: index.rank(user_id) for user_id in chunk})
+        if progress:
+            progress(start + len(chunk), len(user_ids))
+    # users who are no longer candidates keep nothing
+    AlumniRecommendation.objects.exclude(user_id__in=candidate_users().values('id')).delete()
+    return len(user_ids)
+
+
+def _capped_ids(queryset, field, feature, df):
+    # a feature shared by more alumni than the cap is broad anyway; its true count keeps the weight right
+    ids = list(queryset.values_list(field, flat=True).distinct()[:REFRESH_CANDIDATES + 1])
+    if len(ids) > REFRESH_CANDIDATES:
+        ids = ids[:REFRESH_CANDIDATES]
+        if feature is not None:
+            df[feature] = queryset.values(field).distinct().count()
+    return ids
+
+
+def refresh_user(user):
+    """Re-rank one user after a profile edit, loading only the postings of that user's own features.
+
+    Each posting is capped at REFRESH_CANDIDATES alumni, so a large batch or
+    degree costs a bounded read. Other users' lists pick the change up on the
+    next full recompute.
+    """
+    users = candidate_users()
+    if not users.filter(pk=user.pk).exists():
+        AlumniRecommendation.objects.filter(user=user).delete()
+        return
+
+    # (feature, queryset of alumni having it, user id column)
+    postings = []
+    if user.year_graduated:
+        postings.append((('batch', user.year_graduated), users.filter(year_graduated=user.year_graduated), 'id'))
+    if user.degree:
+        postings.append((('degree', user.degree), users.filter(degree=user.degree), 'id'))
+    club_names = {
+        name.strip().lower() for name in ClubOrg.objects.filter(user=user).values_list('org_name', flat=True) if name.strip()
+    }
+    for name in club_names:
+        # club names are matched case-insensitively, like the features built from them
+        postings.append((('club', name), ClubOrg.objects.filter(org_name__iexact=name, user__in=users), 'user_id'))
+    title_ids = set(
+        JobEntry.objects.filter(user=user, canonical_title__isnull=False).values_list('canonical_title_id', flat=True)
+    )
+    for title_id in title_ids:
+        postings.append((('job', title_id), JobEntry.objects.filter(canonical_title_id=title_id, user__in=users), 'user_id'))
+
+    features = defaultdict(set)
+    features[user.pk] = {feature for feature, _, _ in postings}
+    df = {}
+    for feature, queryset, field in postings:
+        for user_id in _capped_ids(queryset, field, feature, df):
+            features[user_id].add(feature)
+    if user.year_graduated and user.degree:
+        # the same batch and degree make the closest broad match; keep them even when both postings were cut
+        cohort = users.filter(year_graduated=user.year_graduated, degree=user.degree)
+        for user_id in _capped_ids(cohort, 'id', None, df):
+            features[user_id].update({('batch', user.year_graduated), ('degree', user.degree)})
+
+    index = FeatureIndex(features)
+    index.set_total(users.count(), df)
+    _store({user.pk: index.rank(user.pk)})
+
+
+class RefreshQueue:
+    """User ids waiting for refresh_user(), worked off by a background thread.
+
+    Profile saves only add the id (after their transaction commits), so the
+    request never waits on re-ranking, and several edits to one profile before
+    the thread gets to it are ranked once. Ids still queued when a worker
+    exits are covered by the next `compute_recommendations` run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def put(self, user_id):
+        self._ensure_started()
+        with self._lock:
+            self._pending.add(user_id)
+        self._wake.set()
+
+    def drain(self):
+        """Refresh every queued user; returns how many were refreshed."""
+        with self._lock:
+            user_ids, self._pending = self._pending, set()
+        done = 0
+        for user in CustomUser.objects.filter(pk__in=user_ids):
+            try:
+                refresh_user(user)
+                done += 1
+            except Exception:
+                logger.exception('refreshing recommendations for user %s failed', user.pk)
+        return done
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='recommendations-refresh', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.drain()
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+
+queue = RefreshQueue()
+
+
+def schedule_refresh(user):
+    """Re-rank `user` once the current transaction commits, on the background thread unless RECOMMENDATIONS_ASYNC is off."""
+    user_id = user.pk
+    if settings.RECOMMENDATIONS_ASYNC:
+        transaction.on_commit(lambda: queue.put(user_id))
+    else:
+        transaction.on_commit(lambda: refresh_user(CustomUser.objects.get(pk=user_id)))
+
+
+def recommended_for(user, limit=RECOMMENDATION_COUNT):
+    """Stored recommendations for `user`, skipping anyone deleted or deactivated since they were computed."""
+    return [
+        rec.recommended for rec in
+        AlumniRecommendation.objects.filter(
+            user=user, recommended__is_active=True, recommended__deleted_at__isnull=True,
+        ).select_related('recommended').order_by('rank')[:limit]
+    ]
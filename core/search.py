@@ -0,0 +1,214 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+
+from . import search_cache
+from .facets import apply_facets, facet_counts
+from .job_titles import matching_title_ids
+from .models import CustomUser, Event, Forum, JobEntry, Updates, audience_q
+
+
+PREVIEW_SIZE = 10  # rows per category on the combined results page
+PAGE_SIZE = 25  # rows per page when one category is paged alone
+
+CATEGORIES = ['users', 'admins', 'events', 'updates', 'forums']
+
+_pool = None
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=settings.SEARCH_WORKERS, thread_name_prefix='search')
+    return _pool
+
+
+def directory_users(query):
+    """Alumni matching the text query, before facets are applied."""
+    users = CustomUser.objects.live().filter(is_staff=False)
+    if query:
+        users = users.filter(
+            Q(student_number__icontains=query) |
+            Q(full_name__icontains=query) |
+            Q(address__icontains=query) |
+            Q(degree__icontains=query) |
+            Q(year_graduated__icontains=query) |
+            Q(id__in=JobEntry.objects.filter(
+                canonical_title_id__in=matching_title_ids(query)
+            ).values('user_id'))
+        )
+    return users
+
+
+def _visible(queryset, user):
+    # staff see everything; alumni only what they could open from the feeds
+    if user.is_staff:
+        return queryset
+    audience = user.audience_ids if user.is_authenticated else (None, None)
+    return queryset.filter(audience_q(*audience)).distinct()
+
+
+def category_queryset(name, query, user):
+    """Ordered matches for one of the text-only categories (everything but `users`)."""
+    if name == 'admins':
+        return CustomUser.objects.live().filter(
+            Q(is_staff=True) &
+            (Q(full_name__icontains=query) |
+             Q(username__icontains=query))
+        ).order_by('full_name', 'pk')
+    if name == 'events':
+        return _visible(Event.objects.filter(
+            Q(title__icontains=query) |
+            Q(location__icontains=query) |
+            Q(description__icontains=query)
+        ), user).order_by('-created_at', '-pk')
+    if name == 'updates':
+        return _visible(Updates.objects.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(related_event__title__icontains=query)
+        ), user).order_by('-date_posted', '-pk')
+    if name == 'forums':
+        return _visible(Forum.objects.filter(author__deleted_at__isnull=True).filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(author__full_name__icontains=query)
+        ), user).select_related('author').order_by('-date_posted', '-pk')
+    raise ValueError(f'Unknown search category {name!r}')
+
+
+class SearchPage:
+    """One category's slice of results; iterates like the list of rows it holds."""
+
+    def __init__(self, name, rows, number, size, params):
+        self.name = name
+        self.has_next = len(rows) > size
+        self.object_list = rows[:size]
+        self.number = number
+        self.has_previous = number > 1
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _query(self, page):
+        params = self._params.copy()
+        params['category'] = self.name
+        params['page'] = page
+        return params.urlencode()
+
+    @property
+    def more_query(self):
+        return self._query(1)
+
+    @property
+    def next_query(self):
+        return self._query(self.number + 1)
+
+    @property
+    def previous_query(self):
+        return self._query(self.number - 1)
+
+
+def _fetch(queryset, offset, size):
+    # one row past the page says whether there is a next page, without a COUNT
+    return list(queryset[offset:offset + size + 1])
+
+
+def _in_worker(context, fn, *args):
+    # each search thread keeps its own connection, recycled like a request's
+    def run():
+        close_old_connections()
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
+    return context.run(run)
+
+
+def run_concurrently(tasks):
+    """{key: fn()} for {key: (fn, *args)}, running the calls side by side on the search pool.
+
+    The request's context variables (the replica choice in core.db_router) are
+    copied into each worker, so they read from the same database the view would.
+    """
+    if settings.SEARCH_WORKERS <= 1 or len(tasks) <= 1:
+        return {key: fn(*args) for key, (fn, *args) in tasks.items()}
+    pool = _executor()
+    futures = {
+        key: pool.submit(_in_worker, contextvars.copy_context(), fn, *args)
+        for key, (fn, *args) in tasks.items()
+    }
+    return {key: future.result() for key, future in futures.items()}
+
+
+def _audience_key(name, user):
+    # only the categories filtered by _visible() differ between audiences
+    if name not in ('events', 'updates', 'forums') or user.is_staff:
+        return 'all'
+    return user.audience_ids if user.is_authenticated else (None, None)
+
+
+def search(query, selected, user, params, category=None, page=1):
+    """Capped result pages for every category (or one category, paged alone) plus the directory facets.
+
+    Returns ({category: SearchPage}, facets). Categories other than `users`
+    only run for a text query; `users` also runs from facets alone. Pages and
+    facets already in the search cache are served from it; only the rest are queried.
+    """
+    query = search_cache.normalize_query(query)
+    names = [category] if category else CATEGORIES
+    if not query:
+        names = [name for name in names if name == 'users'] if selected else []
+    size = PAGE_SIZE if category else PREVIEW_SIZE
+    offset = (page - 1) * size if category else 0
+
+    params = params.copy()
+    for key in ('category', 'page'):
+        params.pop(key, None)
+    if 'q' in params:
+        params['q'] = query  # links and facet cache keys carry the normalized text
+
+    wanted = list(names) + (['facets'] if 'users' in names else [])
+    cached, keys = {}, {}
+    if search_cache.enabled() and wanted:
+        facet_key = tuple(sorted((name, tuple(sorted(values))) for name, values in selected.items()))
+        parts = {
+            name: (query.casefold(), offset, size, facet_key, _audience_key(name, user))
+            for name in wanted
+        }
+        if 'facets' in parts:
+            # facet links carry the rest of the query string, so it is part of their key
+            parts['facets'] = (query, facet_key, params.urlencode())
+        keys = search_cache.get_cache().keys(parts)
+        cached = search_cache.get_cache().get_many(keys)
+
+    tasks = {}
+    for name in names:
+        if name == 'users':
+            if 'users' in cached and 'facets' in cached:
+                continue
+            directory = directory_users(query)
+            if 'users' not in cached:
+                tasks['users'] = (_fetch, apply_facets(directory, selected).select_related('current_job').order_by('full_name', 'pk'), offset, size)
+            if 'facets' not in cached:
+                tasks['facets'] = (facet_counts, directory, selected, params)
+        elif name not in cached:
+            tasks[name] = (_fetch, category_queryset(name, query, user), offset, size)
+    results = run_concurrently(tasks)
+    if keys:
+        search_cache.get_cache().set_many({keys[name]: value for name, value in results.items()})
+    results.update(cached)
+
+    facets = results.pop('facets', [])
+    pages = {
+        name: SearchPage(name, results[name], page if category else 1, size, params)
+        for name in names
+    }
+    return pages, facets
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+VERSION_TIMEOUT = None  # version counters never expire; losing one only costs a cache miss
+
+# models whose rows each search category reads; saving or deleting any of them
+# moves that category to a new key space. Users and forum authors also carry the
+# profile_changed_at stamp their profile cards are looked up by, which job and
+# club edits move.
+CATEGORY_MODELS = {
+    'users': ('customuser', 'jobentry', 'cluborg'),
+    'admins': ('customuser',),
+    'events': ('event',),
+    'updates': ('updates', 'event'),
+    'forums': ('forum', 'customuser', 'jobentry', 'cluborg'),
+    'facets': ('customuser', 'jobentry', 'cluborg'),
+}
+# CustomUser fields no search result shows or filters on; saves of only these (the
+# last_login write on every sign-in, password changes) keep the cached results
+UNSEARCHED_USER_FIELDS = {'last_login', 'password', 'profile_changed_at'}
+WATCHED_MODELS = sorted({name for names in CATEGORY_MODELS.values() for name in names})
+
+
+class LRUCache:
+    """A bounded, thread-safe LRU of (expires at, value) pairs; the least recently used entry goes first."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= now:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SearchCache:
+    """Result pages of core.search, cached per normalized query, category, page and audience.
+
+    Keys embed the current version of every model the category reads, so a
+    save or delete (core.signals bumps the counter) makes older entries
+    unreachable instead of having to find and delete them. Lookups go to the
+    in-process LRU first, then to the SEARCH_CACHE_SHARED backend if one is set.
+
+    Version counters live in the SEARCH_CACHE_VERSIONS cache; with several
+    worker processes it must be a shared backend (Redis, Memcached, database)
+    for one worker's writes to invalidate the others' entries.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+        self._stats_lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'local_hits': 0, 'shared_hits': 0, 'misses': 0})
+
+    @property
+    def versions(self):
+        return caches[settings.SEARCH_CACHE_VERSIONS]
+
+    @property
+    def shared(self):
+        alias = settings.SEARCH_CACHE_SHARED
+        return caches[alias] if alias else None
+
+    def _versions_for(self, categories):
+        names = sorted({name for category in categories for name in CATEGORY_MODELS[category]})
+        keys = {name: f'search:version:{name}' for name in names}
+        found = self.versions.get_many(keys.values())
+        missing = [key for key in keys.values() if key not in found]
+        if missing:
+            # a counter that never existed or was evicted restarts from the clock, never
+            # from a value older entries were keyed under
+            start = int(time.time() * 1000)
+            for key in missing:
+                self.versions.add(key, start, VERSION_TIMEOUT)
+            found.update(self.versions.get_many(missing))
+        return {name: found.get(key, 0) for name, key in keys.items()}
+
+    def keys(self, parts):
+        """{category: cache key} for {category: hashable key parts}, with current model versions folded in."""
+        versions = self._versions_for(parts)
+        return {
+            category: repr((
+                category, key_parts,
+                tuple(versions[name] for name in CATEGORY_MODELS[category]),
+            ))
+            for category, key_parts in parts.items()
+        }
+
+    def get_many(self, keys):
+        """{category: cached value} for whichever of `keys` ({category: key}) are cached."""
+        found = {}
+        missing = {}
+        for category, key in keys.items():
+            value = self.local.get(key)
+            if value is not None:
+                found[category] = value
+                self._count(category, 'local_hits')
+            else:
+                missing[category] = key
+        if missing and self.shared is not None:
+            shared = self.shared.get_many([f'search:{key}' for key in missing.values()])
+            for category, key in list(missing.items()):
+                value = shared.get(f'search:{key}')
+                if value is not None:
+                    found[category] = value
+                    self.local.set(key, value)
+                    self._count(category, 'shared_hits')
+                    del missing[category]
+        for category in missing:
+            self._count(category, 'misses')
+        return found
+
+    def set_many(self, values):
+        """Store {key: value}; only fresh query results should go in, never ones built from cached rows."""
+        for key, value in values.items():
+            self.local.set(key, value)
+        if values and self.shared is not None:
+            self.shared.set_many({f'search:{key}': value for key, value in values.items()}, settings.SEARCH_CACHE_TTL)
+
+    def bump(self, model_name):
+        key = f'search:version:{model_name}'
+        try:
+            self.versions.incr(key)
+        except ValueError:
+            # no counter yet: starting one from the clock is already a fresh key space
+            if not self.versions.add(key, int(time.time() * 1000), VERSION_TIMEOUT):
+                self.versions.incr(key)
+
+    def _count(self, category, outcome):
+        with self._stats_lock:
+            self._stats[category][outcome] += 1
+
+    def stats(self):
+        """Hit counts and ratio per category for this process, plus the LRU's fill level."""
+        with self._stats_lock:
+            categories = {}
+            for category, counts in self._stats.items():
+                total = sum(counts.values())
+                hits = counts['local_hits'] + counts['shared_hits']
+                categories[category] = {**counts, 'hit_ratio': round(hits / total, 3) if total else 0.0}
+        return {'entries': len(self.local), 'max_entries': self.local.max_entries, 'categories': categories}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = SearchCache()
+    return _cache
+
+
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def versions_shared():
+    """Whether the SEARCH_CACHE_VERSIONS alias is seen by every worker process, so bumps reach them all."""
+    backend = settings.CACHES.get(settings.SEARCH_CACHE_VERSIONS, {}).get('BACKEND')
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+
+def enabled():
+    if settings.SEARCH_CACHE_ENABLED is None:
+        return versions_shared()
+    return settings.SEARCH_CACHE_ENABLED
+
+
+def normalize_query(query):
+    """The search text with surrounding and repeated whitespace removed; what the queries actually match."""
+    return ' '.join((query or '').split())
+
+
+def bump(model_name):
+    if enabled():
+        get_cache().bump(model_name)
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search_cache, typeahead
+from .models import Batch, ClubOrg, CustomUser, Degree, Event, Forum, JobEntry, Updates
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Forum)
+def reindex_typeahead(sender, instance, **kwargs):
+    typeahead.refresh(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Forum)
+def forget_typeahead(sender, instance, **kwargs):
+    typeahead.forget(instance)
+
+
+@receiver(m2m_changed, sender=Event.visibility_batches.through)
+@receiver(m2m_changed, sender=Event.visibility_degrees.through)
+@receiver(m2m_changed, sender=Forum.visibility_batches.through)
+@receiver(m2m_changed, sender=Forum.visibility_degrees.through)
+def reindex_typeahead_audience(sender, instance, action, reverse, **kwargs):
+    if action.startswith('post_') and not reverse:
+        typeahead.refresh(instance)
+
+
+@receiver(m2m_changed, sender=Event.visibility_batches.through)
+@receiver(m2m_changed, sender=Event.visibility_degrees.through)
+def touch_event_audience(sender, instance, action, reverse, **kwargs):
+    # calendar feed ETags key off updated_at, which audience edits would not otherwise move
+    if action.startswith('post_') and not reverse:
+        Event.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Batch)
+def forget_batch_id(sender, instance, **kwargs):
+    # users' batch_ref is nulled by the FK; the next save recreates the row
+    cache.delete(Batch.cache_key(instance.year))
+
+
+@receiver(post_delete, sender=Degree)
+def forget_degree_id(sender, instance, **kwargs):
+    cache.delete(Degree.cache_key(instance.code))
+
+
+@receiver(post_save, sender=JobEntry)
+@receiver(post_delete, sender=JobEntry)
+def sync_current_job(sender, instance, update_fields=None, **kwargs):
+    # renames (and normalize_job_titles' canonical_title writes) cannot change which job is current
+    if update_fields is not None and not {'user', 'is_current', 'date_added'} & set(update_fields):
+        return
+    CustomUser.objects.refresh_current_job(instance.user_id)
+
+
+@receiver(post_save, sender=JobEntry)
+@receiver(post_save, sender=ClubOrg)
+@receiver(post_delete, sender=JobEntry)
+@receiver(post_delete, sender=ClubOrg)
+def touch_profile_card(sender, instance, update_fields=None, **kwargs):
+    # profile cards show the current job title and clubs; canonical_title is not shown
+    if update_fields is not None and set(update_fields) <= {'canonical_title'}:
+        return
+    CustomUser.objects.touch_profile(instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=JobEntry)
+@receiver(post_save, sender=ClubOrg)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Updates)
+@receiver(post_save, sender=Forum)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=JobEntry)
+@receiver(post_delete, sender=ClubOrg)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Updates)
+@receiver(post_delete, sender=Forum)
+def bump_search_version(sender, update_fields=None, **kwargs):
+    if sender is CustomUser and update_fields is not None and set(update_fields) <= search_cache.UNSEARCHED_USER_FIELDS:
+        return
+    # after commit, so a search racing the write cannot cache the old rows under the new version
+    model_name = sender._meta.model_name
+    transaction.on_commit(lambda: search_cache.bump(model_name))
+
+
+@receiver(m2m_changed, sender=Event.visibility_batches.through)
+@receiver(m2m_changed, sender=Event.visibility_degrees.through)
+@receiver(m2m_changed, sender=Updates.visibility_batches.through)
+@receiver(m2m_changed, sender=Updates.visibility_degrees.through)
+@receiver(m2m_changed, sender=Forum.visibility_batches.through)
+@receiver(m2m_changed, sender=Forum.visibility_degrees.through)
+def bump_search_version_audience(sender, instance, action, reverse, model, **kwargs):
+    if action.startswith('post_'):
+        model_name = (model if reverse else type(instance))._meta.model_name
+        transaction.on_commit(lambda: search_cache.bump(model_name))
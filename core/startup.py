@@ -0,0 +1,60 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+
+# What a worker does before it can answer its first request: load the WSGI
+# application (settings, apps, models, signals) and the URLconf, which imports
+# every view module. Prints its own elapsed seconds on the last line.
+COLD_START_SCRIPT = """
+import os, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+
+BYTECODE_WARNING = (
+    'PYTHONDONTWRITEBYTECODE is set, so every run recompiles the sources and the '
+    'times include compilation that deployed workers (with .pyc files) skip.'
+)
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def run_cold_start(importtime=False):
+    """Run one fresh interpreter through COLD_START_SCRIPT; returns (seconds, stderr)."""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', COLD_START_SCRIPT.format(settings_module=os.environ['DJANGO_SETTINGS_MODULE'])]
+    result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs, depth)] from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def aggregate(rows, depth=None):
+    """Self time per module, or per package prefix of `depth` dotted parts: {name: (µs, module count)}."""
+    totals = defaultdict(lambda: [0, 0])
+    for module, self_us, _, _ in rows:
+        name = '.'.join(module.split('.')[:depth]) if depth else module
+        totals[name][0] += self_us
+        totals[name][1] += 1
+    return {name: tuple(value) for name, value in totals.items()}
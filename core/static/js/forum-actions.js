@@ -0,0 +1,74 @@
+// Forum feed actions over the JSON endpoints; each response patches only the affected post or comment.
+// The forms still post to the forum view when this script is unavailable.
+(function() {
+  function csrfToken(form) {
+    const input = form && form.querySelector('input[name="csrfmiddlewaretoken"]');
+    return input ? input.value : '';
+  }
+
+  function post(url, body, token) {
+    return fetch(url, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'X-CSRFToken': token, 'X-Requested-With': 'XMLHttpRequest' },
+      body: body
+    }).then(r => r.json().then(data => { if (!r.ok || !data.success) throw data; return data; }));
+  }
+
+  document.addEventListener('submit', function(e) {
+    const form = e.target;
+    const url = form.getAttribute('data-url');
+    if (!url) return;
+
+    if (form.classList.contains('create-post-form')) {
+      e.preventDefault();
+      post(url, new FormData(form), csrfToken(form)).then(data => {
+        const feed = document.querySelector('.forum-feed');
+        if (feed) feed.insertAdjacentHTML('afterbegin', data.html);
+        form.reset();
+        if (typeof closeModal === 'function') closeModal();
+      }).catch(() => alert('Failed to publish post'));
+
+    } else if (form.classList.contains('like-post-form')) {
+      e.preventDefault();
+      const body = new FormData();
+      body.append('post_id', form.querySelector('input[name="like_post"]').value);
+      post(url, body, csrfToken(form)).then(data => {
+        const count = form.querySelector('.like-count');
+        if (count) count.textContent = data.like_count;
+      }).catch(() => alert('Failed to like/unlike'));
+
+    } else if (form.classList.contains('comment-post-form')) {
+      e.preventDefault();
+      const textarea = form.querySelector('textarea[name="comment_content"]');
+      if (!textarea.value.trim()) return;
+      post(url, new FormData(form), csrfToken(form)).then(data => {
+        const list = form.parentElement.querySelector('.comment-list');
+        const empty = list.querySelector('.no-comments');
+        if (empty) empty.remove();
+        list.insertAdjacentHTML('beforeend', data.html);
+        textarea.value = '';
+      }).catch(() => alert('Failed to post comment'));
+
+    } else if (form.classList.contains('delete-post-form')) {
+      e.preventDefault();
+      if (!confirm(form.getAttribute('data-confirm'))) return;
+      post(url, null, csrfToken(form)).then(data => {
+        const el = document.getElementById('post-' + data.post_id);
+        if (el) el.remove();
+      }).catch(() => alert('Failed to delete post'));
+    }
+  });
+
+  document.addEventListener('click', function(e) {
+    const link = e.target.closest('.delete-comment');
+    if (!link) return;
+    e.preventDefault();
+    if (!confirm(link.getAttribute('data-confirm'))) return;
+    const token = csrfToken(link.closest('.comment-section') || document);
+    post(link.getAttribute('data-url'), null, token).then(data => {
+      const el = document.getElementById('comment-' + data.comment_id);
+      if (el) el.remove();
+    }).catch(() => alert('Failed to delete comment'));
+  });
+})();
@@ -0,0 +1,26 @@
+// "View older comments" on forum posts: pages backwards through the forum_comments endpoint
+document.addEventListener('click', function(e) {
+  const btn = e.target.closest('.load-older-comments');
+  if (!btn) return;
+  e.preventDefault();
+  const list = btn.parentElement.querySelector('.comment-list');
+  const cursor = btn.getAttribute('data-cursor');
+  if (!list || !cursor) return;
+
+  btn.disabled = true;
+  fetch(btn.getAttribute('data-url') + '?before=' + encodeURIComponent(cursor), {
+    credentials: 'same-origin',
+    headers: { 'X-Requested-With': 'XMLHttpRequest' }
+  }).then(r => { if (!r.ok) throw new Error('Failed to load'); return r.json(); })
+  .then(data => {
+    // each page is oldest first and belongs above everything already shown
+    list.insertAdjacentHTML('afterbegin', data.comments.map(c => c.html).join(''));
+    if (data.next_cursor) {
+      btn.setAttribute('data-cursor', data.next_cursor);
+      btn.disabled = false;
+    } else {
+      btn.remove();
+    }
+  })
+  .catch(() => { btn.disabled = false; });
+});
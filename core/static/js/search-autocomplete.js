@@ -0,0 +1,52 @@
+// Typeahead suggestions for the global search bar (served by the search_autocomplete view)
+document.addEventListener('DOMContentLoaded', function() {
+  const input = document.querySelector('.search-bar[data-autocomplete-url]');
+  if (!input) return;
+  const list = input.parentElement.querySelector('.search-suggestions');
+  const url = input.getAttribute('data-autocomplete-url');
+  let timer = null;
+  let lastQuery = '';
+
+  function hide() {
+    list.hidden = true;
+    list.innerHTML = '';
+  }
+
+  function render(results) {
+    list.innerHTML = '';
+    if (!results.length) return hide();
+    results.forEach(function(result) {
+      const li = document.createElement('li');
+      const link = document.createElement('a');
+      link.href = result.url;
+      link.textContent = result.label;
+      const kind = document.createElement('span');
+      kind.className = 'suggestion-type';
+      kind.textContent = result.type;
+      link.appendChild(kind);
+      li.appendChild(link);
+      list.appendChild(li);
+    });
+    list.hidden = false;
+  }
+
+  input.addEventListener('input', function() {
+    const q = input.value.trim();
+    clearTimeout(timer);
+    if (!q) return hide();
+    timer = setTimeout(function() {
+      lastQuery = q;
+      fetch(`${url}?q=${encodeURIComponent(q)}`, { credentials: 'same-origin' })
+        .then(r => r.json())
+        .then(data => { if (q === lastQuery) render(data.results || []); })
+        .catch(err => console.error('Error loading suggestions', err));
+    }, 120);
+  });
+
+  document.addEventListener('click', function(e) {
+    if (!input.parentElement.contains(e.target)) hide();
+  });
+  input.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') hide();
+  });
+});
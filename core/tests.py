@@ -1,3 +1,121 @@
-from django.test import TestCase
+import time
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import ResolverMatch, resolve, reverse
+
+from core.db_router import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, _use_replica, health
+from core.models import CustomUser
+
+
+class StressSqliteWritesTests(TransactionTestCase):
+    def test_concurrent_toggles_hit_no_lock_errors(self):
+        # the command raises CommandError (exits non-zero) on any lock error or lost toggle
+        out = StringIO()
+        call_command('stress_sqlite_writes', writers=16, writes=6, stdout=out)
+        self.assertIn('lock errors: 0  other database errors: 0', out.getvalue())
+
+    def test_leaves_the_configured_database_alone(self):
+        call_command('stress_sqlite_writes', writers=4, writes=2, stdout=StringIO())
+        self.assertFalse(CustomUser.objects.filter(student_number__startswith='stress-').exists())
+        CustomUser.objects.create(student_number='S1', full_name='Still Here')
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        health._down_until.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        health._down_until.clear()
+
+    def request(self, method, path, **extra):
+        request = getattr(self.factory, method)(path, **extra)
+        request.resolver_match = resolve(path)
+        return request
+
+    def serve(self, request):
+        """Run `request` through the middleware; returns (alias reads went to, response)."""
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, request.resolver_match.func, (), {})
+            seen['alias'] = ReplicaRouter().db_for_read(CustomUser)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return seen['alias'], response
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    @patch('core.db_router.pick_replica', return_value='replica1')
+    def test_read_only_get_reads_from_the_replica(self, pick):
+        alias, response = self.serve(self.request('get', reverse('events')))
+        self.assertEqual(alias, 'replica1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    @patch('core.db_router.pick_replica', return_value='replica1')
+    def test_other_views_read_from_the_primary(self, pick):
+        alias, _ = self.serve(self.request('get', reverse('admin_user_list')))
+        self.assertIsNone(alias)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    @patch('core.db_router.pick_replica', return_value='replica1')
+    def test_writes_use_the_primary_and_pin_the_client(self, pick):
+        alias, response = self.serve(self.request('post', reverse('events')))
+        self.assertIsNone(alias)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    @patch('core.db_router.pick_replica', return_value='replica1')
+    def test_pinned_client_reads_from_the_primary(self, pick):
+        request = self.request('get', reverse('events'))
+        request.COOKIES[PIN_COOKIE] = str(int(time.time()) + 60)
+        alias, _ = self.serve(request)
+        self.assertIsNone(alias)
+
+    def test_sessions_always_read_from_the_primary(self):
+        token = _use_replica.set('replica1')
+        try:
+            self.assertIsNone(ReplicaRouter().db_for_read(Session))
+            self.assertEqual(ReplicaRouter().db_for_write(CustomUser), 'default')
+        finally:
+            _use_replica.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_replicas_are_never_migrated(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica1', 'core'))
+        self.assertIsNone(router.allow_migrate('default', 'core'))
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_failed_replica_read_reruns_the_view_on_the_primary(self):
+        def view(request):
+            return HttpResponse(ReplicaRouter().db_for_read(CustomUser) or 'default')
+
+        request = self.request('get', reverse('events'))
+        request.resolver_match = ResolverMatch(view, (), {}, url_name='events')
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        token = _use_replica.set('replica1')
+        try:
+            response = middleware.process_exception(request, OperationalError('no such table'))
+        finally:
+            _use_replica.reset(token)
+        self.assertEqual(response.content, b'default')
+        self.assertFalse(health.healthy('replica1'))
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_other_errors_are_not_retried(self):
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        token = _use_replica.set('replica1')
+        try:
+            self.assertIsNone(middleware.process_exception(self.request('get', reverse('events')), ValueError()))
+        finally:
+            _use_replica.reset(token)
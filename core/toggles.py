@@ -0,0 +1,43 @@
+from django.db import transaction
+
+from . import write_behind
+from .models import Like
+from .write_queue import run_write
+
+
+def toggle_like(user, post):
+    """Like or unlike `post` for `user`; returns (liked, like_count).
+
+    The read and the write share one transaction, which settings open with
+    BEGIN IMMEDIATE on SQLite, so the write lock is taken up front instead of
+    being upgraded mid-transaction (the usual source of "database is locked").
+    """
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(user=user, post=post).delete()
+        if not deleted:
+            Like.objects.create(user=user, post=post)
+    return not deleted, post.likes.count()
+
+
+def toggle_interest(user, event):
+    """Add or remove `user` from `event.interested`; returns (interested, interest_count)."""
+    with transaction.atomic():
+        interested = not event.interested.filter(pk=user.pk).exists()
+        if interested:
+            event.interested.add(user)
+        else:
+            event.interested.remove(user)
+    return interested, event.interested.count()
+
+
+def record_like(user, post):
+    """toggle_like through the write-behind buffer or the write queue, whichever settings enable."""
+    if write_behind.enabled():
+        return write_behind.buffer.toggle('like', user.pk, post.pk)
+    return run_write(toggle_like, user, post)
+
+
+def record_interest(user, event):
+    if write_behind.enabled():
+        return write_behind.buffer.toggle('interest', user.pk, event.pk)
+    return run_write(toggle_interest, user, event)
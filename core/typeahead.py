@@ -0,0 +1,253 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.urls import reverse
+
+from .models import CustomUser, Event, Forum
+
+
+TYPEAHEAD_LIMIT = 8
+TYPEAHEAD_MAX_SCAN = 400  # keys examined per lookup, so a one-letter prefix never walks the whole index
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _terms(*texts):
+    """Every word plus the whole lowercased string, so both "juan" and "dela cruz" prefix-match."""
+    terms = set()
+    for text in texts:
+        if not text:
+            continue
+        text = text.lower()
+        terms.add(text)
+        terms.update(_WORD_RE.findall(text))
+    return tuple(terms)
+
+
+class Entry:
+    __slots__ = ('kind', 'label', 'url', 'visibility_type', 'batches', 'degrees')
+
+    def __init__(self, kind, label, url, visibility_type='public', batches=(), degrees=()):
+        self.kind = kind
+        self.label = label
+        self.url = url
+        self.visibility_type = visibility_type
+        # audiences are a handful of values at most; tuples are far smaller than sets
+        self.batches = tuple(batches)
+        self.degrees = tuple(degrees)
+
+    def visible_to(self, user):
+        if user.is_staff or self.visibility_type == 'public':
+            return True
+        if self.visibility_type == 'batch':
+            return user.year_graduated in self.batches
+        if self.visibility_type == 'degree':
+            return user.degree in self.degrees
+        return False
+
+
+class PrefixIndex:
+    """Sorted array of (term, kind, pk) searched with bisect.
+
+    Built from the database on first use in each process and patched in place
+    by the model signals in core.signals, so a lookup is one binary search
+    plus a short forward scan. Signals only reach the process that made the
+    change, so every TYPEAHEAD_CHECK_SECONDS the index also compares a cheap
+    fingerprint of the indexed tables (row counts and high-water marks) with
+    the one it was built from and rebuilds when another worker changed them.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()  # one rebuild at a time; lookups keep using the old arrays meanwhile
+        self._loaded = False
+        self._keys = []
+        self._entries = {}
+        self._terms = {}
+        self._fingerprint = None
+        self._checked_at = 0
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _fresh(self):
+        # an index filled by an explicit load() (the benchmark) has no fingerprint and is left alone
+        if not self._loaded:
+            return False
+        return self._fingerprint is None or time.monotonic() - self._checked_at < settings.TYPEAHEAD_CHECK_SECONDS
+
+    def _ensure_loaded(self):
+        if self._fresh():
+            return
+        with self._refresh_lock:
+            if self._fresh():
+                return
+            self._checked_at = time.monotonic()
+            fingerprint = _fingerprint()
+            if self._loaded and fingerprint == self._fingerprint:
+                return
+            self.load(_load_all())
+            self._fingerprint = fingerprint
+
+    def load(self, records):
+        """Replace the contents with (kind, pk, terms, entry) records, sorting once at the end."""
+        entries, all_terms, keys = {}, {}, []
+        for kind, pk, terms, entry in records:
+            entries[(kind, pk)] = entry
+            all_terms[(kind, pk)] = terms
+            keys.extend((term, kind, pk) for term in terms)
+        keys.sort()
+        with self._lock:
+            self._entries = entries
+            self._terms = all_terms
+            self._keys = keys
+            self._loaded = True
+
+    def put(self, kind, pk, terms, entry):
+        with self._lock:
+            self._remove(kind, pk)
+            self._entries[(kind, pk)] = entry
+            self._terms[(kind, pk)] = terms
+            for term in terms:
+                insort(self._keys, (term, kind, pk))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._remove(kind, pk)
+
+    def _remove(self, kind, pk):
+        for term in self._terms.pop((kind, pk), ()):
+            i = bisect_left(self._keys, (term, kind, pk))
+            if i < len(self._keys) and self._keys[i] == (term, kind, pk):
+                del self._keys[i]
+        self._entries.pop((kind, pk), None)
+
+    def search(self, prefix, user, limit=TYPEAHEAD_LIMIT):
+        self._ensure_loaded()
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            keys = self._keys
+            i = bisect_left(keys, (prefix,))
+            end = min(len(keys), i + TYPEAHEAD_MAX_SCAN)
+            while i < end and len(results) < limit:
+                term, kind, pk = keys[i]
+                if not term.startswith(prefix):
+                    break
+                i += 1
+                if (kind, pk) in seen:
+                    continue
+                seen.add((kind, pk))
+                entry = self._entries.get((kind, pk))
+                if entry is not None and entry.visible_to(user):
+                    results.append({'type': entry.kind, 'label': entry.label, 'url': entry.url})
+        return results
+
+    def reset(self):
+        with self._lock:
+            self._loaded = False
+            self._keys = []
+            self._entries = {}
+            self._terms = {}
+            self._fingerprint = None
+
+
+index = PrefixIndex()
+
+
+def _user_record(user):
+    label = f"{user.full_name} ({user.student_number})" if user.student_number else user.full_name
+    entry = Entry('user', label, reverse('user_profile', args=[user.pk]))
+    return 'user', user.pk, _terms(user.full_name, user.student_number), entry
+
+
+def _audience_record(kind, obj, url_name, batches, degrees):
+    entry = Entry(kind, obj.title, reverse(url_name, args=[obj.pk]), obj.visibility_type, batches, degrees)
+    return kind, obj.pk, _terms(obj.title), entry
+
+
+def _audiences(model):
+    """{object id: ([batch years], [degree codes])} for every row of an audience-scoped model."""
+    audiences = {}
+    for pk, year in model.visibility_batches.through.objects.values_list(
+            f'{model._meta.model_name}_id', 'batch__year'):
+        audiences.setdefault(pk, ([], []))[0].append(year)
+    for pk, code in model.visibility_degrees.through.objects.values_list(
+            f'{model._meta.model_name}_id', 'degree__code'):
+        audiences.setdefault(pk, ([], []))[1].append(code)
+    return audiences
+
+
+def _fingerprint():
+    """Counts and high-water marks that move whenever a row the index holds is added, edited or removed."""
+    users = CustomUser.objects.live().filter(is_active=True).aggregate(
+        n=Count('id'), changed=Max('profile_changed_at'), top=Max('id'))
+    events = Event.objects.aggregate(n=Count('id'), changed=Max('updated_at'))
+    forums = Forum.objects.filter(author__deleted_at__isnull=True).aggregate(n=Count('id'), top=Max('id'))
+    audiences = tuple(
+        through.objects.count()
+        for through in (Forum.visibility_batches.through, Forum.visibility_degrees.through)
+    )
+    return tuple(users.values()), tuple(events.values()), tuple(forums.values()), audiences
+
+
+def _load_all():
+    for user in CustomUser.objects.live().filter(is_active=True).only('id', 'full_name', 'student_number').iterator():
+        yield _user_record(user)
+
+    event_audiences = _audiences(Event)
+    for event in Event.objects.only('id', 'title', 'visibility_type').iterator():
+        yield _audience_record('event', event, 'event_detail', *event_audiences.get(event.pk, ((), ())))
+
+    forum_audiences = _audiences(Forum)
+    forums = Forum.objects.filter(author__deleted_at__isnull=True).only('id', 'title', 'visibility_type')
+    for forum in forums.iterator():
+        yield _audience_record('forum', forum, 'forum_detail', *forum_audiences.get(forum.pk, ((), ())))
+
+
+def refresh(instance):
+    """Re-index one saved object; a no-op until the index has been built in this process."""
+    if not index.loaded:
+        return
+    if isinstance(instance, CustomUser):
+        if instance.deleted_at or not instance.is_active:
+            index.remove('user', instance.pk)
+        else:
+            index.put(*_user_record(instance))
+        return
+
+    kind, url_name = ('event', 'event_detail') if isinstance(instance, Event) else ('forum', 'forum_detail')
+    batches = list(instance.visibility_batches.values_list('year', flat=True))
+    degrees = list(instance.visibility_degrees.values_list('code', flat=True))
+    index.put(*_audience_record(kind, instance, url_name, batches, degrees))
+
+
+def forget(instance):
+    if not index.loaded:
+        return
+    kind = {CustomUser: 'user', Event: 'event', Forum: 'forum'}[type(instance)]
+    index.remove(kind, instance.pk)
+
+
+def sync_users(user_ids):
+    """Re-index users changed by a queryset.update(), which sends no post_save."""
+    if not index.loaded:
+        return
+    live = {user.pk: user for user in CustomUser.objects.filter(id__in=user_ids)}
+    for pk in user_ids:
+        if pk in live:
+            refresh(live[pk])
+        else:
+            index.remove('user', pk)
@@ -9,7 +9,7 @@ urlpatterns = [
 
     path('admin-register/', views.admin_register, name='admin_register'),
 
-    # Generic admin-panel router (accepts ?panel=users|events|updates|forum)
+    # Generic admin-panel router (accepts ?panel=users|events|updates|forum|audit)
     path('admin-panel/', views.admin_panel_router, name='admin_panel'),
 
     path('admin-panel/admin_dashboard/', views.admin_dashboard, name='admin_dashboard'),
@@ -20,6 +20,8 @@ urlpatterns = [
     path('admin-panel/users/<int:user_id>/delete/', views.admin_user_delete, name='admin_user_delete'),
     path('admin-panel/users/<int:user_id>/reset/', views.admin_user_reset_password, name='admin_user_reset_password'),
     path('admin-panel/users/batch-upload/', views.admin_user_batch_upload, name='admin_user_batch_upload'),
+    path('admin-panel/users/bulk/', views.admin_user_bulk_action, name='admin_user_bulk_action'),
+    path('admin-panel/users/export/', views.admin_user_export, name='admin_user_export'),
 
 
     path('admin-panel/events/', views.admin_event_list, name='admin_event_list'),
@@ -36,6 +38,9 @@ urlpatterns = [
     path('admin-panel/forum/', views.admin_forum_list, name='admin_forum_list'),
     path('admin-panel/forum/delete/<int:post_id>/', views.admin_delete_post, name='admin_delete_post'),
 
+    path('admin-panel/audit/', views.admin_audit_list, name='admin_audit_list'),
+    path('admin-panel/search-cache/', views.admin_search_cache_stats, name='admin_search_cache_stats'),
+
 
 
 
@@ -46,6 +51,8 @@ urlpatterns = [
 
 
     path('events/', views.events_view, name='events'),
+    path('events/calendar/<str:token>.ics', views.event_calendar_feed, name='event_calendar_feed'),
+    path('events/calendar/reset/', views.reset_calendar_token, name='reset_calendar_token'),
     path('event/<int:pk>/', EventDetailView.as_view(), name='event_detail'),
     path('event/<int:pk>/toggle-interest/', views.toggle_event_interest, name='toggle_event_interest'),
     path('updates/', views.updates_view, name='updates'),
@@ -56,9 +63,14 @@ urlpatterns = [
     path('forum/', views.forum, name='forum'),
     path('like-post/', views.like_post_ajax, name='like_post_ajax'),
     path('forum/comment/<int:post_id>/', views.comment_post_ajax, name='comment_post'),
+    path('forum/<int:post_id>/comments/', views.forum_comments, name='forum_comments'),
+    path('forum/post/create/', views.forum_post_create, name='forum_post_create'),
+    path('forum/post/<int:post_id>/delete/', views.forum_post_delete, name='forum_post_delete'),
+    path('forum/comment/<int:comment_id>/remove/', views.forum_comment_delete, name='forum_comment_delete'),
     path('forum/comment/delete/<int:comment_id>/', views.delete_comment, name='delete_comment'),
 
     path('search/', views.global_search_view, name='global_search'),
+    path('search/autocomplete/', views.search_autocomplete, name='search_autocomplete'),
     path('change-password/', CustomPasswordChangeView.as_view(), name='change_password'),
     path('logout/', views.logout_view, name='logout'),
 ]
@@ -1,5 +1,4 @@
 import json
-import csv
 from django.contrib import messages
 from collections import Counter, defaultdict
 from django.contrib.auth import authenticate, get_user_model, login, logout
@@ -8,16 +7,17 @@ from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 from django.contrib.auth.views import PasswordChangeView
 from django.contrib.messages.views import SuccessMessageMixin
 from django.db.models import Q
-from django.db.models import Count, F, ExpressionWrapper, IntegerField
+from django.db.models import Count, F, ExpressionWrapper, IntegerField, prefetch_related_objects
 from django.db.models.functions import ExtractYear
 from django.forms import inlineformset_factory
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.crypto import get_random_string
+from django.utils.http import parse_etags, urlencode
 from django.views.decorators.http import require_POST
 from django.views.generic import DetailView
-from django.core.paginator import Paginator
 from .forms import (
     CommentForm,
     CustomUserCreationForm,
@@ -31,11 +31,22 @@ from .forms import (
     UserProfileEditForm,
     AdminProfileForm,
 )
-from .models import Comment, CustomUser, Event, Forum, JobEntry, ClubOrg, Like, Updates, Batch, Degree
+from .admin_lists import paginate_admin_list
+from .bulk import BULK_AUDIT_ACTIONS, BULK_USER_ACTIONS, reset_user_passwords, set_users_active, soft_delete_users
+from .calendar_feed import audience_document, audience_etag, feed_token, parse_token
+from .comments import COMMENT_PAGE_SIZE, attach_latest_comments, older_comments
+from .facets import apply_facets, facet_counts, selected_facets
+from .media import media_response
+from .profile_cards import attach_profile_cards
+from .recommendations import recommended_for, schedule_refresh as refresh_recommendations
+from .search import CATEGORIES as SEARCH_CATEGORIES, search as run_search
+from .toggles import record_interest, record_like
+from .typeahead import index as typeahead_index
+from . import audit, search_cache, write_behind
+from .models import AuditEvent, Comment, CustomUser, Event, Forum, JobEntry, ClubOrg, Like, Updates, audience_q
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.timezone import now
-from datetime import datetime
 
 
 
@@ -77,6 +88,34 @@ def admin_register(request):
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
+# ?sort= values each admin list accepts, mapped to the columns it orders by
+USER_SORTS = {
+    'id': ('id',),
+    '-id': ('-id',),
+    'full_name': ('full_name',),
+    '-full_name': ('-full_name',),
+}
+EVENT_SORTS = {
+    '-created_at': ('done', '-created_at'),
+    'created_at': ('done', 'created_at'),
+    'title': ('done', 'title'),
+    '-title': ('done', '-title'),
+}
+UPDATES_SORTS = {
+    '-date_posted': ('-date_posted',),
+    'date_posted': ('date_posted',),
+    'title': ('title',),
+    '-title': ('-title',),
+}
+FORUM_SORTS = {
+    '-date_posted': ('-date_posted',),
+    'date_posted': ('date_posted',),
+}
+AUDIT_SORTS = {
+    '-created_at': ('-created_at',),
+    'created_at': ('created_at',),
+}
+
 # @login_required
 # @user_passes_test(is_admin)
 # def post_login_redirect(request):
@@ -117,12 +156,20 @@ def admin_dashboard(request):
     # Convert to sorted list for JSON
     yearly_data = [{"year": y, **d} for y, d in sorted(yearly_distribution.items())]
 
+    # Most common current jobs, one join through the maintained current_job pointer
+    job_data = list(
+        CustomUser.objects.live().filter(current_job__isnull=False)
+        .values_list('current_job__job_title').annotate(n=Count('id'))
+        .order_by('-n', 'current_job__job_title')[:10]
+    )
+
     # provide admin profile form so the dashboard can open the edit modal in-place
     admin_profile_form = AdminProfileForm(instance=request.user)
 
     return render(request, 'admin_panel/admin_dashboard.html', {
         'course_data': course_data,
         'yearly_data': yearly_data,
+        'job_data': job_data,
         'user': request.user,
         'admin_profile_form': admin_profile_form,
     })
@@ -165,20 +212,11 @@ def admin_profile_view(request):
 @user_passes_test(is_admin)
 def admin_user_list(request):
     query = request.GET.get('q', '')
-    users = CustomUser.objects.all()
-
-    if query:
-        users = users.filter(
-            Q(full_name__icontains=query) |
-            Q(student_number__icontains=query) |
-            Q(year_graduated__icontains=query) |
-            Q(address__icontains=query) |
-            Q(degree__icontains=query)
-        )
-
-    paginator = Paginator(users, 10)  # 10 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    selected = selected_facets(request.GET)
+    users = filter_admin_users(CustomUser.objects.select_related('current_job'), query, selected)
+    page_obj = paginate_admin_list(request, users, USER_SORTS, 'id')
+    attach_profile_cards(page_obj.object_list)
+    facets = facet_counts(filter_admin_users(CustomUser.objects.all(), query), selected, request.GET)
 
     # provide a blank user form for the modal (create)
     user_form = CustomUserCreationForm()
@@ -191,15 +229,31 @@ def admin_user_list(request):
         'page_obj': page_obj,
         'user_form': user_form,
         'admin_profile_form': admin_profile_form,
+        'bulk_actions': BULK_USER_ACTIONS,
+        'facets': facets,
+        'selected_facets': selected,
     })
 
+def filter_admin_users(users, query, facets=None):
+    if facets:
+        users = apply_facets(users, facets)
+    if query:
+        users = users.filter(
+            Q(full_name__icontains=query) |
+            Q(student_number__icontains=query) |
+            Q(year_graduated__icontains=query) |
+            Q(address__icontains=query) |
+            Q(degree__icontains=query)
+        )
+    return users
+
 @login_required
 @user_passes_test(is_admin)
 def admin_user_create(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            form.save()
+            audit.record(request.user, 'create', 'user', form.save())
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'redirect': reverse('admin_user_list')})
             return redirect('admin_user_list')
@@ -232,6 +286,8 @@ def admin_user_batch_upload(request):
             csv_file.seek(0)
             decoded_file = csv_file.read().decode('windows-1252').splitlines()
 
+        import csv  # only admin uploads need it; keeps worker start-up lean
+
         reader = csv.DictReader(decoded_file)
 
         created_count = 0
@@ -258,6 +314,7 @@ def admin_user_batch_upload(request):
             )
             created_count += 1
 
+        audit.record(request.user, 'import', 'user', file=csv_file.name, count=created_count)
         messages.success(request, f'{created_count} users created successfully.')
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({'success': True, 'redirect': reverse('admin_user_list')})
@@ -274,6 +331,7 @@ def admin_user_edit(request, user_id):
         form = CustomUserCreationForm(request.POST, instance=user)
         if form.is_valid():
             form.save()
+            audit.record(request.user, 'edit', 'user', user, fields=form.changed_data)
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'redirect': reverse('admin_user_list')})
             return redirect('admin_user_list')
@@ -301,7 +359,8 @@ def admin_user_edit(request, user_id):
 def admin_user_delete(request, user_id):
     user = get_object_or_404(CustomUser, id=user_id)
     user_name = user.full_name or user.username
-    user.delete()
+    user.soft_delete()
+    audit.record(request.user, 'delete', 'user', user)
     messages.success(request, f"{user_name} has been deactivated.")
     return redirect('admin_user_list')
 
@@ -312,9 +371,68 @@ def admin_user_reset_password(request, user_id):
     new_password = user.student_number or user.username
     user.set_password(new_password)
     user.save()
+    audit.record(request.user, 'reset_password', 'user', user)
     messages.success(request, f"Password for {user.full_name or user.username} has been reset to: {new_password}")
     return redirect('admin_user_list')
 
+@login_required
+@user_passes_test(is_admin)
+def admin_user_export(request):
+    """Stream every user matching the list's `q` filter as a CSV download."""
+    from .exports import iter_user_csv  # pulls in csv; imported on first export, not at start-up
+
+    query = request.GET.get('q', '')
+    # the same rows admin_user_list shows for these filters, soft-deleted users included
+    users = filter_admin_users(CustomUser.objects.all(), query, selected_facets(request.GET))
+    response = StreamingHttpResponse(iter_user_csv(users), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="alumni_{timezone.now():%Y%m%d}.csv"'
+    return response
+
+@require_POST
+@login_required
+@user_passes_test(is_admin)
+def admin_user_bulk_action(request):
+    """Apply one action to the checked users, or to every user matching `q` when select_all is set."""
+    action = request.POST.get('action', '')
+    query = request.POST.get('q', '')
+    facets = selected_facets(request.POST)
+    # back to the same filtered list the admin acted on
+    params = urlencode({'q': query, **facets} if query else facets, doseq=True)
+    redirect_url = reverse('admin_user_list') + (f'?{params}' if params else '')
+
+    if action not in BULK_USER_ACTIONS:
+        messages.error(request, "Unknown bulk action.")
+        return redirect(redirect_url)
+
+    if request.POST.get('select_all'):
+        users = filter_admin_users(CustomUser.objects.all(), query, facets)
+    else:
+        user_ids = [i for i in request.POST.getlist('user_ids') if i.isdigit()]
+        users = CustomUser.objects.filter(id__in=user_ids)
+
+    # never let an admin lock out or delete their own account from the list
+    users = users.exclude(pk=request.user.pk)
+
+    if action == 'deactivate':
+        count = set_users_active(users, False)
+        messages.success(request, f"{count} users deactivated.")
+    elif action == 'activate':
+        count = set_users_active(users, True)
+        messages.success(request, f"{count} users activated.")
+    elif action == 'reset':
+        count = reset_user_passwords(users)
+        messages.success(request, f"Passwords reset for {count} users.")
+    elif action == 'delete':
+        count = soft_delete_users(users)
+        messages.success(request, f"{count} users deleted.")
+
+    audit.record(
+        request.user, BULK_AUDIT_ACTIONS[action], 'user',
+        count=count, select_all=bool(request.POST.get('select_all')), query=query,
+    )
+
+    return redirect(redirect_url)
+
 
 ## ADMIN EVENT
 
@@ -322,9 +440,7 @@ def admin_user_reset_password(request, user_id):
 @user_passes_test(is_admin)
 def admin_event_list(request):
     query = request.GET.get('q', '')
-    sort_by = request.GET.get('sort', '-created_at')
-    today = datetime.now()
-    events = Event.objects.all().order_by(sort_by, 'done')
+    events = Event.objects.all()
 
     if query:
         events = events.filter(
@@ -334,12 +450,8 @@ def admin_event_list(request):
             Q(location__icontains=query)
         )  
 
-    events= list(events)
-    events.sort(key=lambda e:e.done)
-
-    paginator = Paginator(events, 10)  # 10 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # pending events always list before done ones, whichever sort is picked
+    page_obj = paginate_admin_list(request, events, EVENT_SORTS, '-created_at')
 
     # blank event form for modal
     event_form = EventForm()
@@ -350,7 +462,7 @@ def admin_event_list(request):
         'events': page_obj.object_list,
         'query': query,
         'page_obj': page_obj,
-        'today': today,
+        'now': timezone.now(),
         'event_form': event_form,
         'admin_profile_form': admin_profile_form,
     })
@@ -361,7 +473,7 @@ def admin_event_create(request):
     if request.method == 'POST':
         form = EventForm(request.POST)
         if form.is_valid():
-            form.save()
+            audit.record(request.user, 'create', 'event', form.save())
             messages.success(request, 'Event created successfully.')
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'redirect': reverse('admin_event_list')})
@@ -387,6 +499,7 @@ def admin_event_edit(request, event_id):
         form = EventForm(request.POST, instance=event)
         if form.is_valid():
             form.save()
+            audit.record(request.user, 'edit', 'event', event, fields=form.changed_data)
             messages.success(request, 'Event updated successfully.')
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'redirect': reverse('admin_event_list')})
@@ -414,6 +527,7 @@ def admin_event_edit(request, event_id):
 @user_passes_test(is_admin)
 def admin_event_delete(request, event_id):
     event = get_object_or_404(Event, id=event_id)
+    audit.record(request.user, 'delete', 'event', event)
     event.delete()
     messages.success(request, f'Event "{event.title}" has been deleted.')
     return redirect('admin_event_list')
@@ -425,6 +539,7 @@ def admin_event_mark_done(request, event_id):
     if not event.done:
         event.done = True
         event.save()
+        audit.record(request.user, 'mark_done', 'event', event)
         messages.success(request, f'Event "{event.title}" marked as done.')
     else:
         messages.info(request, f'Event "{event.title}" is already done.')
@@ -437,8 +552,7 @@ def admin_event_mark_done(request, event_id):
 @user_passes_test(is_admin)
 def admin_updates_list(request):
     query = request.GET.get('q', '')
-    sort_by = request.GET.get('sort', '-date_posted')
-    updates = Updates.objects.all().order_by(sort_by)
+    updates = Updates.objects.select_related('related_event')
 
     if query:
         updates = updates.filter(
@@ -448,9 +562,7 @@ def admin_updates_list(request):
             Q(related_event__title__icontains=query)
         )  
 
-    paginator = Paginator(updates, 10)  # 10 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_admin_list(request, updates, UPDATES_SORTS, '-date_posted')
 
     updates_form = UpdatesForm()
     admin_profile_form = AdminProfileForm(instance=request.user)
@@ -471,7 +583,7 @@ def admin_updates_create(request):
     if request.method == 'POST':
         form = UpdatesForm(request.POST)
         if form.is_valid():
-            form.save()
+            audit.record(request.user, 'create', 'update', form.save())
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'redirect': reverse('admin_updates_list')})
             return redirect('admin_updates_list')
@@ -495,6 +607,7 @@ def admin_updates_edit(request, update_id):
         form = UpdatesForm(request.POST, instance=update)
         if form.is_valid():
             form.save()
+            audit.record(request.user, 'edit', 'update', update, fields=form.changed_data)
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'success': True, 'redirect': reverse('admin_updates_list')})
             return redirect('admin_updates_list')
@@ -521,6 +634,7 @@ def admin_updates_edit(request, update_id):
 @user_passes_test(is_admin)
 def admin_updates_delete(request, update_id):
     update = get_object_or_404(Updates, pk=update_id)
+    audit.record(request.user, 'delete', 'update', update)
     update.delete()
     return redirect('admin_updates_list')
 
@@ -531,7 +645,7 @@ def admin_updates_delete(request, update_id):
 @user_passes_test(is_admin)
 def admin_forum_list(request):
     query = request.GET.get('q', '')
-    posts = Forum.objects.select_related('author').prefetch_related('comments__user').order_by('-date_posted')
+    posts = Forum.objects.select_related('author').prefetch_related('comments__user')
 
     if query:
         posts = posts.filter(
@@ -542,9 +656,8 @@ def admin_forum_list(request):
             Q(date_posted__icontains=query) 
         )
 
-    paginator = Paginator(posts, 5)  # 10 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_admin_list(request, posts, FORUM_SORTS, '-date_posted', per_page=5)
+    attach_profile_cards(post.author for post in page_obj.object_list)
 
     admin_profile_form = AdminProfileForm(instance=request.user)
 
@@ -560,14 +673,61 @@ def admin_forum_list(request):
 @user_passes_test(is_admin)
 def admin_delete_post(request, post_id):
     post = get_object_or_404(Forum, id=post_id)
+    audit.record(request.user, 'delete', 'forum', post)
     post.delete()
     return redirect('admin_forum_list')
 
 
+## ADMIN AUDIT LOG
+
+@login_required
+@user_passes_test(is_admin)
+def admin_audit_list(request):
+    """Recorded admin actions, newest first, filterable by action, target and actor."""
+    query = request.GET.get('q', '')
+    action = request.GET.get('action', '')
+    target_type = request.GET.get('target_type', '')
+    target_id = request.GET.get('target_id', '')
+    actor_id = request.GET.get('actor', '')
+
+    entries = AuditEvent.objects.all()
+    if action in dict(AuditEvent.ACTION_CHOICES):
+        entries = entries.filter(action=action)
+    if target_type in dict(AuditEvent.TARGET_CHOICES):
+        entries = entries.filter(target_type=target_type)
+        if target_id.isdigit():
+            entries = entries.filter(target_id=target_id)
+    if actor_id.isdigit():
+        entries = entries.filter(actor_id=actor_id)
+    if query:
+        entries = entries.filter(Q(actor_label__icontains=query) | Q(target_label__icontains=query))
+
+    page_obj = paginate_admin_list(request, entries, AUDIT_SORTS, '-created_at', per_page=25)
+
+    return render(request, 'admin_panel/admin_list.html', {
+        'panel': 'audit',
+        'entries': page_obj.object_list,
+        'page_obj': page_obj,
+        'query': query,
+        'action': action,
+        'target_type': target_type,
+        'action_choices': AuditEvent.ACTION_CHOICES,
+        'target_choices': AuditEvent.TARGET_CHOICES,
+        'admin_profile_form': AdminProfileForm(instance=request.user),
+    })
+
+
+@login_required
+@user_passes_test(is_admin)
+def admin_search_cache_stats(request):
+    """Search cache hit ratios for the worker answering this request, for tuning its size and TTL."""
+    return JsonResponse(search_cache.get_cache().stats())
+
+
 @login_required
 @user_passes_test(is_admin)
 def admin_panel_router(request):
-    """Compatibility router: accepts ?panel=users|events|updates|forum and redirects to the proper admin list view.
+    """Compatibility router: accepts ?panel=users|events|updates|forum|audit and redirects to the proper admin list view.
 
     This helps when external links or bookmarks point to a generic admin panel with a `panel` query param.
     """
@@ -590,6 +750,8 @@ def admin_panel_router(request):
         return redirect(f"{reverse('admin_updates_list')}{qs}")
     if panel == 'forum':
         return redirect(f"{reverse('admin_forum_list')}{qs}")
+    if panel == 'audit':
+        return redirect(f"{reverse('admin_audit_list')}{qs}")
 
     # default to dashboard
     return redirect('admin_dashboard')
@@ -601,7 +763,7 @@ def admin_panel_router(request):
 def home(request):
     user = request.user
     current_datetime = timezone.now()
-    upcoming_events = Event.objects.filter(date__gte=timezone.now()).order_by('date')[:5]
+    upcoming_events = Event.objects.filter(done=False, starts_at__gt=current_datetime).order_by('starts_at')[:5]
     recent_updates = Updates.objects.all().order_by('-date_posted')
     forum_posts_count = Forum.objects.filter(author=request.user).count()
     comments_count = Comment.objects.filter(user=user).count()
@@ -625,29 +787,9 @@ def profile_view(request):
 
     job_entries = user.job_entries.all().order_by('-date_added')
     club_orgs = user.club_orgs.all()
-    # Determine active/inactive state for display:
-    # Consider these employment statuses as "active-capable" (include freelancing and others as requested)
-    ACTIVE_STATUSES = {'employed', 'freelancing', 'studying', 'other'}
-    active_capable = (user.employment_status in ACTIVE_STATUSES)
-
-    if active_capable and job_entries.exists():
-        # Prefer jobs explicitly marked current; if multiple, pick the most recent one by date_added
-        current_jobs = [j for j in job_entries if j.is_current]
-        if current_jobs:
-            # pick most recent current job
-            active_job = max(current_jobs, key=lambda j: j.date_added or datetime.min)
-        else:
-            # if only one job, it's active; otherwise choose the most recent job
-            if job_entries.count() == 1:
-                active_job = job_entries[0]
-            else:
-                active_job = max(job_entries, key=lambda j: j.date_added or datetime.min)
-
-        for job in job_entries:
-            job.is_active = (job.pk == active_job.pk)
-    else:
-        for job in job_entries:
-            job.is_active = False
+    # current_job is kept up to date on every job and status change (see CustomUserManager)
+    for job in job_entries:
+        job.is_active = (job.pk == user.current_job_id)
 
     context = {
         'user': user,
@@ -699,6 +841,7 @@ def profile_edit_view(request):
                 club.user = user
                 club.save()
             club_formset.save_m2m()
+            refresh_recommendations(user)
 
             messages.success(request, 'Profile updated successfully.')
             return redirect('profile')
@@ -710,51 +853,16 @@ def profile_edit_view(request):
         job_formset = JobEntryFormSet(instance=user, prefix='jobentry_set')
         club_formset = ClubOrgFormSet(instance=user, prefix='cluborg_set')
 
-    # Annotate each form in the job formset with an `is_active` flag for template rendering.
-    ACTIVE_STATUSES = {'employed', 'freelancing', 'studying', 'other'}
-    active_capable = (user.employment_status in ACTIVE_STATUSES)
-
-    # Collect existing job instances (those with pk) ordered by date_added desc
-    existing_jobs = list(JobEntry.objects.filter(user=user).order_by('-date_added'))
-    existing_count = len(existing_jobs)
-
-    # Determine which job should be active in the edit UI
-    active_job_pk = None
-    if active_capable and (existing_count > 0 or any(not getattr(jf.instance, 'pk', None) for jf in job_formset.forms)):
-        # Prefer explicit current flags among existing jobs
-        current_existing = [j for j in existing_jobs if j.is_current]
-        if current_existing:
-            active_job_pk = max(current_existing, key=lambda j: j.date_added or datetime.min).pk
+    # Annotate each form in the job formset with an `is_active` flag for template rendering:
+    # the saved current job, or, when there is none yet, the last blank form
+    active_capable = (user.employment_status in CustomUser.ACTIVE_EMPLOYMENT_STATUSES)
+    new_forms = [jf for jf in job_formset.forms if not jf.instance.pk]
+    last_new_form = new_forms[-1] if new_forms else None
+    for jf in job_formset.forms:
+        if jf.instance.pk:
+            jf.is_active = (jf.instance.pk == user.current_job_id)
         else:
-            # If there's any new (unsaved) form, make the newest new form active (assume it's appended last)
-            new_forms = [jf for jf in job_formset.forms if not getattr(jf.instance, 'pk', None)]
-            if new_forms:
-                # mark the last new form as active by setting a marker on the form (no pk available)
-                # we'll set is_active=True on that form below
-                pass
-            else:
-                # fallback: if only one existing job, active that; else pick most recent existing
-                if existing_count == 1:
-                    active_job_pk = existing_jobs[0].pk
-                elif existing_count > 1:
-                    active_job_pk = existing_jobs[0].pk
-
-    # Apply is_active flags to formset forms
-    if active_capable:
-        # find last new form if any
-        new_forms = [jf for jf in job_formset.forms if not getattr(jf.instance, 'pk', None)]
-        last_new_form = new_forms[-1] if new_forms else None
-
-        for jf in job_formset.forms:
-            inst = getattr(jf, 'instance', None)
-            if inst and getattr(inst, 'pk', None):
-                jf.is_active = (active_job_pk is not None and inst.pk == active_job_pk)
-            else:
-                # unsaved/new form: active if it's the last new form and no existing job was explicitly selected
-                jf.is_active = (last_new_form is not None and jf is last_new_form and active_job_pk is None)
-    else:
-        for jf in job_formset.forms:
-            jf.is_active = False
+            jf.is_active = (active_capable and jf is last_new_form and user.current_job_id is None)
 
     context = {
         'form': form,
@@ -773,6 +881,11 @@ class UserProfileDetailView(DetailView):
     template_name = 'core/search_detail.html'
     context_object_name = 'user_profile'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['recommended_alumni'] = attach_profile_cards(recommended_for(self.object))
+        return context
+
 
 def login_view(request):
     if request.method == 'POST':
@@ -797,40 +910,30 @@ def events_view(request):
     now = timezone.now()
     visibility_filter = request.GET.get('visibility', '')
 
-    # Initial queryset (not done and still upcoming/ongoing)
-    events = Event.objects.filter(done=False).exclude(
-        Q(date__lt=now.date()) |
-        Q(date=now.date(), time__lte=now.time())
-    )
+    # Initial queryset (not done and still upcoming/ongoing); undated events stay listed
+    events = Event.objects.filter(done=False).exclude(starts_at__lte=now)
 
     # Apply visibility filter
-    if visibility_filter == 'public':
-        events = events.filter(visibility_type='public')
-    elif visibility_filter == 'batch':
-        events = events.filter(visibility_type='batch', visibility_batches__year=user.year_graduated)
-    elif visibility_filter == 'degree':
-        events = events.filter(visibility_type='degree', visibility_degrees__code=user.degree)
+    if visibility_filter in ('public', 'batch', 'degree'):
+        events = events.filter(audience_q(*user.audience_ids, only=visibility_filter))
     else:
-        events = events.filter(
-            Q(visibility_type='public') |
-            Q(visibility_type='batch', visibility_batches__year=user.year_graduated) |
-            Q(visibility_type='degree', visibility_degrees__code=user.degree)
-        ).distinct()
+        events = events.filter(audience_q(*user.audience_ids)).distinct()
 
-    events = events.order_by('-created_at').prefetch_related('interested')
+    events = write_behind.merge_counts(
+        events.order_by('-created_at').annotate(interest_total=Count('interested', distinct=True)),
+        'interest', 'interest_total',
+    )
 
     # Recently concluded = manually marked as done OR past events
-    recently_concluded = Event.objects.filter(
-        Q(done=True) |
-        Q(date__lt=now.date()) |
-        Q(date=now.date(), time__lte=now.time())
-    ).filter(
-        Q(visibility_type='public') |
-        Q(visibility_type='batch', visibility_batches__year=user.year_graduated) |
-        Q(visibility_type='degree', visibility_degrees__code=user.degree)
-    ).distinct().order_by('-date', '-time')[:5]  # limit for panel
+    # (sweep_done_events marks past events done; the second query covers the ones since its last run).
+    # Two queries rather than an OR, so each walks the (done, starts_at) index and stops after 5 rows
+    concluded = Event.objects.filter(audience_q(*user.audience_ids)).distinct().order_by(
+        F('starts_at').desc(nulls_last=True))
+    recently_concluded = list(concluded.filter(done=True)[:5]) + list(concluded.filter(done=False, starts_at__lte=now)[:5])
+    recently_concluded.sort(key=lambda event: (event.starts_at is not None, event.starts_at), reverse=True)
+    recently_concluded = recently_concluded[:5]  # limit for panel
     # prefetch interested users so membership checks in template don't hit the DB repeatedly
-    recently_concluded = recently_concluded.prefetch_related('interested')
+    prefetch_related_objects(recently_concluded, 'interested')
 
     context = {
         'page_name': 'events',
@@ -842,14 +945,53 @@ def events_view(request):
 
     # For client-side rendering of user's current interest state
     try:
-        user_interested_ids = set(request.user.interested_events.values_list('id', flat=True))
+        user_interested_ids = write_behind.merged_ids(
+            'interest', request.user.pk, request.user.interested_events.values_list('id', flat=True)
+        )
     except Exception:
         user_interested_ids = set()
     context['user_interested_ids'] = user_interested_ids
+    context['calendar_feed_url'] = request.build_absolute_uri(
+        reverse('event_calendar_feed', args=[feed_token(request.user)])
+    )
 
     return render(request, 'core/contents.html', context)
 
 
+@login_required
+def serve_media(request, path):
+    """Uploaded files (profile pictures) for signed-in users; see core.media."""
+    return media_response(request, path)
+
+
+def event_calendar_feed(request, token):
+    """Tokenized .ics feed of the events a user can see; calendar apps poll it without a session."""
+    parsed = parse_token(token)
+    if parsed is None:
+        raise Http404
+    user_id, version = parsed
+    users = CustomUser.objects.live().filter(is_active=True, calendar_token_version=version)
+    user = get_object_or_404(users, pk=user_id)
+
+    etag = audience_etag(*user.audience_ids)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        body = audience_document(*user.audience_ids, etag, request.get_host())
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@require_POST
+@login_required
+def reset_calendar_token(request):
+    """Revoke the user's calendar feed link; the events page then shows a new one."""
+    CustomUser.objects.filter(pk=request.user.pk).update(calendar_token_version=F('calendar_token_version') + 1)
+    return redirect('events')
+
+
 @require_POST
 @login_required
 def toggle_event_interest(request, pk):
@@ -857,17 +999,7 @@ def toggle_event_interest(request, pk):
     Interest is recorded regardless of event.done; callers may choose to show counts only when event.done is True.
     """
     event = get_object_or_404(Event, pk=pk)
-    user = request.user
-
-    if event.interested.filter(pk=user.pk).exists():
-        event.interested.remove(user)
-        interested = False
-    else:
-        event.interested.add(user)
-        interested = True
-
-    # interest count (total users who marked interest)
-    interest_count = event.interested.count()
+    interested, interest_count = record_interest(request.user, event)
 
     return JsonResponse({
         'interested': interested,
@@ -894,18 +1026,10 @@ def updates_view(request):
 
     updates = Updates.objects.all()
 
-    if visibility_filter == 'public':
-        updates = updates.filter(visibility_type='public')
-    elif visibility_filter == 'batch':
-        updates = updates.filter(visibility_type='batch', visibility_batches__year=user.year_graduated)
-    elif visibility_filter == 'degree':
-        updates = updates.filter(visibility_type='degree', visibility_degrees__code=user.degree)
+    if visibility_filter in ('public', 'batch', 'degree'):
+        updates = updates.filter(audience_q(*user.audience_ids, only=visibility_filter))
     else:
-        updates = updates.filter(
-            Q(visibility_type='public') |
-            Q(visibility_type='batch', visibility_batches__year=user.year_graduated) |
-            Q(visibility_type='degree', visibility_degrees__code=user.degree)
-        ).distinct()
+        updates = updates.filter(audience_q(*user.audience_ids)).distinct()
 
     updates = updates.order_by('-date_posted')  
 
@@ -923,61 +1047,61 @@ class UpdateDetailView(DetailView):
     template_name = 'core/search_detail.html'
     context_object_name = 'updates'
 
+def can_modify(user, owner_id):
+    """Authors may delete their own posts and comments; staff may delete anything."""
+    return user.is_staff or owner_id == user.id
+
+
+def create_forum_post(user, form):
+    """Save a valid ForumPostForm for `user`, scoping batch/degree posts to the author's own audience."""
+    post = form.save(commit=False)
+    post.author = user
+    post.save()
+
+    batch_id, degree_id = user.audience_ids
+    if post.visibility_type == 'batch' and batch_id:
+        post.visibility_batches.add(batch_id)
+    elif post.visibility_type == 'degree' and degree_id:
+        post.visibility_degrees.add(degree_id)
+    return post
+
+
 @login_required
 def forum(request):
     user = request.user
-    posts = Forum.visible.user_visible(request.user).order_by('-date_posted')
+    posts = (
+        Forum.visible.user_visible(request.user)
+        .filter(author__deleted_at__isnull=True)
+        .select_related('author')
+        .order_by('-date_posted')
+    )
 
     visibility_filter = request.GET.get('visibility', '')
-    if visibility_filter == 'public':
-        posts = posts.filter(visibility_type='public')
-    elif visibility_filter == 'batch':
-        posts = posts.filter(visibility_type='batch', visibility_batches__year=user.year_graduated)
-    elif visibility_filter == 'degree':
-        posts = posts.filter(visibility_type='degree', visibility_degrees__code=user.degree)
+    if visibility_filter in ('public', 'batch', 'degree'):
+        posts = posts.filter(audience_q(*user.audience_ids, only=visibility_filter))
 
 
     if request.method == 'POST':
         visibility_filter = request.GET.get('visibility', '') or request.POST.get('visibility', '')
         query_param = f'?visibility={visibility_filter}' if visibility_filter else ''
+        # the forum JS posts to the endpoints below; these branches serve browsers without it
         if 'create_post' in request.POST:
             form = ForumPostForm(request.POST)
             if form.is_valid():
-                post = form.save(commit=False)
-                post.author = request.user
-                post.save()
-
-                post.visibility_batches.clear()
-                post.visibility_degrees.clear()
-
-                if post.visibility_type == 'batch':
-                    batch = Batch.objects.filter(year=user.year_graduated).first()
-                    if batch:
-                        post.visibility_batches.add(batch)
-                elif post.visibility_type == 'degree':
-                    degree = Degree.objects.filter(code=user.degree).first()
-                    if degree:
-                        post.visibility_degrees.add(degree)
-
-                        
-
+                create_forum_post(request.user, form)
                 return redirect(f"{reverse('forum')}{query_param}")
 
 
         elif 'like_post' in request.POST:
             post_id = request.POST.get('like_post')
             post = get_object_or_404(Forum, id=post_id)
-            existing = Like.objects.filter(user=request.user, post=post)
-            if existing.exists():
-                existing.delete()
-            else:
-                Like.objects.create(user=request.user, post=post)
+            record_like(request.user, post)
             return redirect(f"{reverse('forum')}{query_param}")
 
 
         elif 'comment_post' in request.POST:
             post_id = request.POST.get('comment_post')
-            comment_content = request.POST.get('comment_content')
+            comment_content = request.POST.get('comment_content', '')
             post = get_object_or_404(Forum, id=post_id)
             if comment_content.strip():
                 Comment.objects.create(user=request.user, post=post, content=comment_content)
@@ -987,7 +1111,7 @@ def forum(request):
         elif 'delete_comment' in request.POST:
             comment_id = request.POST.get('delete_comment')
             comment = get_object_or_404(Comment, id=comment_id)
-            if comment.user == request.user or request.user.is_staff:
+            if can_modify(request.user, comment.user_id):
                 comment.delete()
             return redirect(f"{reverse('forum')}{query_param}")
 
@@ -995,14 +1119,14 @@ def forum(request):
         elif 'delete_post' in request.POST:
             post_id = request.POST.get('delete_post')
             post = get_object_or_404(Forum, id=post_id)
-            if post.author == request.user or request.user.is_staff:
+            if can_modify(request.user, post.author_id):
                 post.delete()
             return redirect(f"{reverse('forum')}{query_param}")
 
 
 
     # Trending based on likes + comments
-    trending_posts = Forum.objects.annotate(
+    trending_posts = Forum.objects.filter(author__deleted_at__isnull=True).annotate(
         num_likes=Count('likes'),
         num_comments=Count('comments'),
         popularity=ExpressionWrapper(
@@ -1011,12 +1135,19 @@ def forum(request):
         )
     ).order_by('-popularity')[:5]
 
+    posts = write_behind.merge_counts(
+        attach_latest_comments(posts.annotate(like_total=Count('likes', distinct=True))), 'like', 'like_total'
+    )
+    attach_profile_cards(post.author for post in posts)
+
     context = {
         'posts': posts,
         'create_form': ForumPostForm(),
         'visibility_filter': visibility_filter,
         'comment_form': CommentForm(),
-        'liked_post_ids': Like.objects.filter(user=request.user).values_list('post_id', flat=True),
+        'liked_post_ids': write_behind.merged_ids(
+            'like', request.user.pk, Like.objects.filter(user=request.user).values_list('post_id', flat=True)
+        ),
         'trending_posts': trending_posts,
         'page_name': 'forum'
     }
@@ -1029,28 +1160,27 @@ def forum(request):
 def like_post_ajax(request):
     post_id = request.POST.get('post_id')
     post = get_object_or_404(Forum, id=post_id)
-
-    like, created = Like.objects.get_or_create(user=request.user, post=post)
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
+    liked, like_count = record_like(request.user, post)
 
     return JsonResponse({
+        'success': True,
         'liked': liked,
-        'like_count': post.likes.count()
+        'like_count': like_count
     })
 
 @require_POST
-def comment_post_ajax(request):
-    data = json.loads(request.body)
-    post_id = data.get('post_id')
-    comment_content = data.get('comment_content')
+@login_required
+def comment_post_ajax(request, post_id):
+    # the search detail modal sends JSON, the forum feed sends the comment form
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or '{}')
+    else:
+        data = request.POST
+    comment_content = (data.get('comment_content') or '').strip()
 
     post = get_object_or_404(Forum, id=post_id)
 
-    if comment_content.strip():
+    if comment_content:
         comment = Comment.objects.create(
             user=request.user,
             post=post,
@@ -1058,11 +1188,51 @@ def comment_post_ajax(request):
         )
         return JsonResponse({
             'success': True,
+            'comment_id': comment.id,
             'user_name': request.user.full_name,
-            'comment_content': comment.content
+            'comment_content': comment.content,
+            'html': render_to_string('core/partials/forum_comment.html', {'comment': comment}, request=request),
         })
 
-    return JsonResponse({'success': False})
+    return JsonResponse({'success': False}, status=400)
+
+
+@require_POST
+@login_required
+def forum_post_create(request):
+    form = ForumPostForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+
+    post = create_forum_post(request.user, form)
+    post.like_total = 0
+    attach_latest_comments([post])
+    attach_profile_cards([post.author])
+    return JsonResponse({
+        'success': True,
+        'post_id': post.id,
+        'html': render_to_string('core/partials/forum_post.html', {'post': post}, request=request),
+    })
+
+
+@require_POST
+@login_required
+def forum_post_delete(request, post_id):
+    post = get_object_or_404(Forum, id=post_id)
+    if not can_modify(request.user, post.author_id):
+        return JsonResponse({'success': False}, status=403)
+    post.delete()
+    return JsonResponse({'success': True, 'post_id': post_id})
+
+
+@require_POST
+@login_required
+def forum_comment_delete(request, comment_id):
+    comment = get_object_or_404(Comment, id=comment_id)
+    if not can_modify(request.user, comment.user_id):
+        return JsonResponse({'success': False}, status=403)
+    comment.delete()
+    return JsonResponse({'success': True, 'comment_id': comment_id})
 
 @login_required
 def delete_comment(request, comment_id):
@@ -1075,63 +1245,78 @@ def delete_comment(request, comment_id):
     return redirect('forum')
 
 
+@login_required
+def forum_comments(request, post_id):
+    """JSON page of a post's comments older than the `before` cursor, for "View older comments"."""
+    posts = Forum.objects if request.user.is_staff else Forum.visible.user_visible(request.user)
+    post = get_object_or_404(posts, id=post_id)
+    comments, next_cursor = older_comments(post, request.GET.get('before'))
+
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.id,
+                'user_name': comment.user.full_name,
+                'content': comment.content,
+                'created_at': comment.created_at.isoformat(),
+                'html': render_to_string('core/partials/forum_comment.html', {'comment': comment}, request=request),
+            }
+            for comment in comments
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
 class ForumPostDetailView(DetailView):
     model = Forum
     template_name = 'core/search_detail.html'
     context_object_name = 'forum'
 
+    def get_queryset(self):
+        return Forum.objects.select_related('author')
 
-def global_search_view(request):
-    query = request.GET.get('q')
-    users = admins = events = updates = forums = []
+    def get_context_data(self, **kwargs):
+        attach_latest_comments([self.object], limit=COMMENT_PAGE_SIZE)
+        return super().get_context_data(**kwargs)
 
-    if query:
-        users = CustomUser.objects.filter(
-            Q(is_staff=False) &
-            (Q(student_number__icontains=query) |
-             Q(full_name__icontains=query) |
-             Q(address__icontains=query) |
-             Q(degree__icontains=query) |
-             Q(year_graduated__icontains=query))
-            #  Q(org_name__icontains=query) |
-            #  Q(job_title__icontains=query))
-        )
-
-        admins = CustomUser.objects.filter(
-            Q(is_staff=True) &
-            (Q(full_name__icontains=query) |
-             Q(username__icontains=query))
-        )
 
-        events = Event.objects.filter(
-            Q(title__icontains=query) |
-            Q(location__icontains=query) |
-            Q(description__icontains=query)
-        )
-
-        updates = Updates.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(related_event__title__icontains=query)
-        )
-
-        forums = Forum.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(author__full_name__icontains=query)
-        )
+def global_search_view(request):
+    query = request.GET.get('q')
+    selected = selected_facets(request.GET)
+    category = request.GET.get('category')
+    if category not in SEARCH_CATEGORIES:
+        category = None
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    # the alumni directory also works from facets alone, without a text query
+    pages, facets = run_search(query, selected, request.user, request.GET, category, page)
+    # every alumnus on the page, listed or authoring a post, in one cache round trip
+    attach_profile_cards([*pages.get('users', []), *(forum.author for forum in pages.get('forums', []))])
+    overview = request.GET.copy()
+    for key in ('category', 'page'):
+        overview.pop(key, None)
 
     context = {
         'query': query,
-        'users': users,
-        'admins': admins,
-        'events': events,
-        'updates': updates,
-        'forums': forums,  
+        'category': category,
+        'category_page': pages.get(category),
+        'overview_query': overview.urlencode(),
+        'facets': facets,
+        **{name: pages.get(name, []) for name in SEARCH_CATEGORIES},
     }
     return render(request, 'search_results.html', context)
 
 
+@login_required
+def search_autocomplete(request):
+    """Prefix matches for the global search box, served from the in-memory typeahead index."""
+    results = typeahead_index.search(request.GET.get('q', ''), request.user)
+    return JsonResponse({'results': results})
+
+
 class CustomPasswordChangeView(SuccessMessageMixin, PasswordChangeView):
     template_name = 'change_password.html'
     success_url = reverse_lazy('profile')
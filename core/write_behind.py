@@ -0,0 +1,241 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Event, Like
+
+
+logger = logging.getLogger(__name__)
+
+# kind -> (row model, target column, user column)
+KINDS = {
+    'like': (Like, 'post_id', 'user_id'),
+    'interest': (Event.interested.through, 'event_id', 'customuser_id'),
+}
+
+MAX_ATTEMPTS = 5  # flushes a toggle may fail before it is dropped
+
+
+class WriteBehindBuffer:
+    """Collects like/interest toggles in memory and writes them in batches.
+
+    Each pending entry is keyed by (kind, user id, target id) and holds the
+    state the user wants plus the state the database will have before it is
+    applied, so toggling twice between flushes cancels out and writes nothing.
+    A background thread flushes every WRITE_BEHIND_FLUSH_MS: one bulk INSERT
+    and one DELETE per kind, all in a single transaction. Toggles on posts,
+    events or users deleted in the meantime are skipped. If the batch still
+    fails, its toggles are written one by one; the ones that fail go back to
+    the pending set and are dropped after MAX_ATTEMPTS flushes, so one bad row
+    never holds up later clicks. Whatever is buffered at exit is flushed by an
+    atexit hook.
+
+    Entries being flushed stay visible to readers until their transaction has
+    committed, so counts never dip between the swap and the commit. The lock
+    is only taken to swap and clear the maps, never across the COMMIT, so
+    toggles are not held up by a slow write; the cost is a short window after
+    the COMMIT and before the in-flight entries are cleared in which count()
+    sees both the new rows and their delta and may read high by the size of
+    the batch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._flushing = {}
+        self._pending_delta = defaultdict(int)
+        self._flushing_delta = defaultdict(int)
+        self._attempts = {}
+        self._thread = None
+
+    def toggle(self, kind, user_id, target_id):
+        """Flip one user's like/interest on one target; returns (active, count) including buffered changes."""
+        self._ensure_started()
+        key = (kind, user_id, target_id)
+        with self._lock:
+            known = self._state(key)
+        # the database is only read when nothing for this key is buffered yet
+        if known is None:
+            known = self._exists(kind, user_id, target_id)
+
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                # a flush may have taken or committed this key since `known` was read;
+                # either way `known` (or the in-flight state) is what the database will hold
+                in_flight = self._flushing.get(key)
+                base = in_flight[0] if in_flight is not None else known
+                entry = (base, base)
+            active = not entry[0]
+            self._pending_delta[(kind, target_id)] += 1 if active else -1
+            if active == entry[1]:
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = (active, entry[1])
+        return active, self.count(kind, target_id)
+
+    def _state(self, key):
+        """Buffered state for `key` (pending first, then in flight), or None if nothing is buffered."""
+        entry = self._pending.get(key) or self._flushing.get(key)
+        return entry[0] if entry is not None else None
+
+    def _exists(self, kind, user_id, target_id):
+        model, target, user = KINDS[kind]
+        return model.objects.filter(**{target: target_id, user: user_id}).exists()
+
+    def delta(self, kind, target_id):
+        """Net rows the buffer will add (or remove, if negative) for one target."""
+        with self._lock:
+            return self._pending_delta.get((kind, target_id), 0) + self._flushing_delta.get((kind, target_id), 0)
+
+    def count(self, kind, target_id):
+        model, target, _ = KINDS[kind]
+        return model.objects.filter(**{target: target_id}).count() + self.delta(kind, target_id)
+
+    def merged_ids(self, kind, user_id, ids):
+        """`ids` (targets the database says the user has) with the user's buffered toggles applied."""
+        ids = set(ids)
+        with self._lock:
+            for entries in (self._flushing, self._pending):
+                for (entry_kind, entry_user, target_id), (active, _) in entries.items():
+                    if entry_kind == kind and entry_user == user_id:
+                        if active:
+                            ids.add(target_id)
+                        else:
+                            ids.discard(target_id)
+        return ids
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of toggles written."""
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                self._flushing_delta, self._pending_delta = self._pending_delta, defaultdict(int)
+                batch = dict(self._flushing)
+            if not batch:
+                return 0
+            try:
+                self._write(batch, self._finish)
+                return len(batch)
+            except Exception:
+                logger.exception('write-behind flush of %d toggles failed; writing them one by one', len(batch))
+            failed = {}
+            for key, entry in batch.items():
+                try:
+                    self._write({key: entry}, lambda: self._forget(key, entry))
+                except Exception:
+                    failed[key] = entry
+            with self._lock:
+                self._finish(failed)
+            return len(batch) - len(failed)
+
+    def _forget(self, key, entry):
+        # one toggle of the in-flight batch is committed; call with `_lock` held
+        kind, _, target_id = key
+        self._flushing.pop(key, None)
+        self._flushing_delta[(kind, target_id)] -= 1 if entry[0] else -1
+
+    def _finish(self, failed=None):
+        """Clear the in-flight batch, returning `failed` toggles to the pending set; call with `_lock` held."""
+        failed = failed or {}
+        self._flushing = {}
+        self._flushing_delta = defaultdict(int)
+        # everything else in the batch was written, so only the failures keep a count
+        self._attempts = {key: n for key, n in self._attempts.items() if key in failed}
+        for key, (active, base) in failed.items():
+            attempts = self._attempts.get(key, 0) + 1
+            later = self._pending.get(key)
+            if later is None and attempts >= MAX_ATTEMPTS:
+                logger.error('dropping write-behind toggle %s after %d failed flushes', key, attempts)
+                self._attempts.pop(key, None)
+                continue
+            # a later toggle of the same key was based on this one's state; fold the two together
+            kind, _, target_id = key
+            self._pending_delta[(kind, target_id)] += 1 if active else -1
+            merged = (later[0] if later is not None else active, base)
+            if merged[0] == merged[1]:
+                self._pending.pop(key, None)
+                self._attempts.pop(key, None)
+            else:
+                self._pending[key] = merged
+                self._attempts[key] = attempts
+
+    def _write(self, batch, on_commit):
+        """Apply `batch` in one transaction, then run `on_commit` with `_lock` held."""
+        adds = defaultdict(list)
+        removes = defaultdict(lambda: defaultdict(list))
+        for (kind, user_id, target_id), (active, _) in batch.items():
+            if active:
+                adds[kind].append((user_id, target_id))
+            else:
+                removes[kind][target_id].append(user_id)
+
+        with transaction.atomic():
+            for kind, rows in adds.items():
+                model, target, user = KINDS[kind]
+                rows = _existing(model, target, user, rows)
+                model.objects.bulk_create(
+                    [model(**{target: target_id, user: user_id}) for user_id, target_id in rows],
+                    ignore_conflicts=True,
+                )
+            for kind, by_target in removes.items():
+                model, target, user = KINDS[kind]
+                condition = Q()
+                for target_id, user_ids in by_target.items():
+                    condition |= Q(**{target: target_id, f'{user}__in': user_ids})
+                model.objects.filter(condition).delete()
+        with self._lock:
+            on_commit()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-behind-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = settings.WRITE_BEHIND_FLUSH_MS / 1000
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+
+def _existing(model, target, user, rows):
+    # a post, event or user deleted since the click would fail the whole INSERT on its foreign key
+    target_model = model._meta.get_field(target).related_model
+    user_model = model._meta.get_field(user).related_model
+    targets = set(target_model.objects.filter(pk__in={t for _, t in rows}).values_list('pk', flat=True))
+    users = set(user_model.objects.filter(pk__in={u for u, _ in rows}).values_list('pk', flat=True))
+    return [(user_id, target_id) for user_id, target_id in rows if user_id in users and target_id in targets]
+
+
+buffer = WriteBehindBuffer()
+atexit.register(buffer.flush)
+
+
+def enabled():
+    return getattr(settings, 'WRITE_BEHIND', False)
+
+
+def merged_ids(kind, user_id, ids):
+    return buffer.merged_ids(kind, user_id, ids) if enabled() else set(ids)
+
+
+def merge_counts(objects, kind, attr):
+    """Add the buffered delta to a count annotation (`attr`) on each object, in place."""
+    if enabled():
+        for obj in objects:
+            setattr(obj, attr, getattr(obj, attr) + buffer.delta(kind, obj.pk))
+    return objects
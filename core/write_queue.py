@@ -0,0 +1,79 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import transaction
+
+
+class WriteQueue:
+    """Runs small writes on one background thread, many per transaction.
+
+    SQLite allows a single writer at a time, so funnelling short writes through
+    one connection and committing them together replaces a burst of competing
+    BEGIN/COMMIT pairs with a few larger ones. Each write runs in its own
+    savepoint, so one failure does not undo the rest of its batch.
+    """
+
+    def __init__(self, max_batch=100):
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        self._ensure_started()
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sqlite-write-queue', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for fn, args, kwargs, future in batch:
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+        except Exception as exc:
+            # the commit itself failed, so nothing in the batch was written
+            for _, _, _, future in batch:
+                future.set_exception(exc)
+            return
+
+        # results are only released once the whole batch has committed
+        for future, result, exc in outcomes:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+write_queue = WriteQueue()
+
+
+def run_write(fn, *args, **kwargs):
+    """Call fn now, or through the shared write queue when SQLITE_WRITE_QUEUE is on."""
+    if not getattr(settings, 'SQLITE_WRITE_QUEUE', False):
+        return fn(*args, **kwargs)
+    return write_queue.submit(fn, *args, **kwargs).result(timeout=settings.SQLITE_WRITE_QUEUE_TIMEOUT)